@@ -1,13 +1,108 @@
-from fastapi import FastAPI, HTTPException, Form, File, UploadFile
-from fastapi.responses import JSONResponse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import os
+import time
+from fastapi import FastAPI, HTTPException, Form, File, Request, UploadFile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.requests import ClientDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pii_identifier import main
+from metrics import CONTENT_TYPE, observe_timings, render_metrics, timed_call
+from pii_identifier import analyze_ndjson_line, check_detect_condition, check_output_mode, get_upload_type, iter_redacted_text, main, main_batch, read_upload
+from result_cache import get_result_cache
+from pydantic import BaseModel
 from typing import List
 from fastapi.staticfiles import StaticFiles
 
 
 app = FastAPI()
 
+# Recognition is CPU-bound, so it runs on a bounded executor instead of the event loop.
+# "thread" shares the loaded models; "process" runs each job in its own worker process.
+API_EXECUTOR = os.environ.get("PII_API_EXECUTOR", "thread")
+API_WORKERS = int(os.environ.get("PII_API_WORKERS", os.cpu_count() or 1))
+
+def create_executor(kind=API_EXECUTOR, workers=API_WORKERS):
+    """
+    Creates the executor that runs entity extraction off the event loop.
+
+    Parameters:
+    - kind (str): "thread" or "process".
+    - workers (int): Maximum number of extractions running at once.
+
+    Returns:
+    - Executor: Thread or process pool with the given number of workers.
+    """
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pii-api")
+    raise ValueError(f"Unknown API executor: {kind}")
+
+executor = create_executor()
+# Streamed responses are produced in this process, a part at a time, so they need threads
+stream_executor = executor if API_EXECUTOR == "thread" else create_executor("thread")
+
+async def run_in_executor(function, *args, **kwargs):
+    """
+    Runs a blocking function on the executor and waits for it without blocking the event loop.
+
+    Parameters:
+    - function (callable): Function to run.
+    - args, kwargs: Arguments passed to the function.
+
+    Returns:
+    - The function's return value.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+async def iterate_in_executor(iterator):
+    """
+    Iterates a blocking iterator on the stream executor without blocking the event loop.
+
+    Parameters:
+    - iterator: Iterator whose items take work to produce.
+
+    Yields:
+    - The iterator's items.
+    """
+    loop = asyncio.get_running_loop()
+    done = object()
+    while True:
+        item = await loop.run_in_executor(stream_executor, next, iterator, done)
+        if item is done:
+            break
+        yield item
+
+async def prepare_upload(input_file, in_place=True):
+    """
+    Turns an upload into input arguments for main() without blocking the event loop.
+
+    Starlette has already spooled the upload, so it is analyzed in place when that
+    happens in this process before the endpoint returns and the form is closed; otherwise
+    it is read into memory, or a temporary file when it is large, on a thread.
+
+    Parameters:
+    - input_file (UploadFile): The upload.
+    - in_place (bool): Whether the spooled upload can be analyzed in place.
+
+    Returns:
+    - dict: Input arguments for main(), as returned by read_upload().
+    """
+    if in_place:
+        return {"input_buffer": input_file.file, "input_type": get_upload_type(input_file.filename)}
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, read_upload, input_file.file, input_file.filename)
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    executor.shutdown(wait=False)
+    stream_executor.shutdown(wait=False)
+
 static_path = "static"
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 
@@ -20,6 +115,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def build_timed_response(content, timings, include_timings=False):
+    """
+    Encodes a JSON response, recording the encoding time and the request's stage timings.
+
+    Parameters:
+    - content: Response content.
+    - timings (dict): Timings block of the request, completed with the encoding time.
+    - include_timings (bool): Whether to add the timings block to the response.
+
+    Returns:
+    - JSONResponse: Encoded response.
+    """
+    start = time.perf_counter()
+    response = JSONResponse(content=content)
+    timings["encoding"] = time.perf_counter() - start
+    observe_timings(timings)
+
+    if include_timings and isinstance(content, dict):
+        response = JSONResponse(content={**content, "timings": timings})
+    return response
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
@@ -28,30 +144,205 @@ async def extract_entities(
     input_file_path: str = Form(None),
     input_text: str = Form(None),
     entities_to_extract: str = Form([]),
-    input_file: UploadFile = File(None)
+    input_file: UploadFile = File(None),
+    include_timings: bool = Form(False),
+    output_mode: str = Form("values"),
+    detect_condition: str = Form("any")
     
 ):
     print(entities_to_extract)
+    try:
+        check_output_mode(output_mode)
+        check_detect_condition(detect_condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    upload_input = {}
+    upload_path = None
     try:
         if not input_file_path and not input_text and not input_file:
             raise HTTPException(stats_code=400, detail="Either 'input_file_path' or 'input_text' must be provided.")
         
         if input_file:
-            # Save the uploaded file to a temporary location
-            with open(input_file_path, 'wb') as temp_file:
-                temp_file.write(input_file.file.read())
-            input_file_path = input_file.filename
+            # A worker process cannot receive the open spooled file
+            upload_input = await prepare_upload(input_file, in_place=API_EXECUTOR == "thread")
+            upload_path = input_file_path = upload_input.pop("input_file_path", None)
 
-        results = main(
+        results, timings = await run_in_executor(
+            timed_call,
+            main,
             input_file_path=input_file_path,
             input_text=input_text,
-            entities_to_extract=eval(entities_to_extract)
+            entities_to_extract=eval(entities_to_extract),
+            output_mode=output_mode,
+            detect_condition=detect_condition,
+            **upload_input
         )
         
-        return JSONResponse(content=results)
+        return build_timed_response(results, timings, include_timings)
    
     except Exception as e:
         print(f"An error occurred in the main function: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        if upload_path:
+            os.remove(upload_path)
+
+class BatchRequest(BaseModel):
+    input_texts: List[str]
+    entities_to_extract: List[str] = []
+    include_timings: bool = False
+    output_mode: str = "values"
+    detect_condition: str = "any"
+
+@app.post('/extract_entities/batch')
+async def extract_entities_batch(batch_request: BatchRequest):
+    try:
+        check_output_mode(batch_request.output_mode)
+        check_detect_condition(batch_request.detect_condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        results, timings = await run_in_executor(
+            timed_call,
+            main_batch,
+            input_texts=batch_request.input_texts,
+            entities_to_extract=batch_request.entities_to_extract,
+            output_mode=batch_request.output_mode,
+            detect_condition=batch_request.detect_condition
+        )
+
+        if isinstance(results, dict) and "error" in results:
+            raise HTTPException(status_code=500, detail=results["error"])
+
+        return build_timed_response({"results": results}, timings, batch_request.include_timings)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"An error occurred in the main_batch function: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post('/redact')
+async def redact_entities(
+    input_file_path: str = Form(None),
+    input_text: str = Form(None),
+    entities_to_extract: str = Form("[]"),
+    operators: str = Form("{}"),
+    input_file: UploadFile = File(None)
+):
+    upload_input = {}
+    upload_path = None
+    try:
+        if input_file:
+            # The redacted text is streamed after the form is closed
+            upload_input = await prepare_upload(input_file, in_place=False)
+            upload_path = input_file_path = upload_input.pop("input_file_path", None)
+
+        redacted_parts = iter_redacted_text(
+            input_file_path=input_file_path,
+            input_text=input_text,
+            entities_to_extract=json.loads(entities_to_extract),
+            operators=json.loads(operators),
+            **upload_input
+        )
+    except ValueError as e:
+        if upload_path:
+            os.remove(upload_path)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The redacted text is sent as it is produced, each part redacted on the bounded executor
+    background = BackgroundTask(os.remove, upload_path) if upload_path else None
+    return StreamingResponse(iterate_in_executor(redacted_parts), media_type="text/plain", background=background)
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streams a response while the request body is still being read.
+
+    StreamingResponse watches for a disconnect by reading from the request, which would
+    take body chunks away from the generator; a disconnect surfaces in the generator's
+    own reads instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def iter_request_lines(request):
+    """
+    Splits the request body into lines as it arrives.
+
+    Parameters:
+    - request (Request): Incoming request.
+
+    Yields:
+    - tuple: (line number, line) of each line, starting at 1.
+    """
+    line_number = 0
+    pending = b""
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            yield line_number, line
+    if pending:
+        yield line_number + 1, pending
+
+@app.post('/extract_entities/stream')
+async def extract_entities_stream(request: Request, entities_to_extract: str = "[]", output_mode: str = "values", detect_condition: str = "any"):
+    try:
+        entities_to_extract = json.loads(entities_to_extract)
+        check_output_mode(output_mode)
+        check_detect_condition(detect_condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def generate():
+        # Lines are read and analyzed ahead while earlier results are sent, at most
+        # API_WORKERS at a time, so memory stays flat however long the stream is
+        queue = asyncio.Queue(maxsize=API_WORKERS)
+
+        async def read_lines():
+            try:
+                async for line_number, line in iter_request_lines(request):
+                    if line.strip():
+                        result = asyncio.ensure_future(
+                            run_in_executor(analyze_ndjson_line, line, line_number, entities_to_extract, output_mode, detect_condition)
+                        )
+                        await queue.put(result)
+            except ClientDisconnect:
+                # Nobody is left to send the results to
+                pass
+            finally:
+                await queue.put(None)
+
+        reader = asyncio.ensure_future(read_lines())
+        try:
+            while True:
+                result = await queue.get()
+                if result is None:
+                    break
+                yield await result
+            await reader
+        finally:
+            reader.cancel()
+
+    return DuplexStreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get('/cache/stats')
+def cache_stats():
+    if API_EXECUTOR == "process":
+        # Extraction runs and caches in the worker processes, each with its own cache;
+        # the counters of this process would always read zero
+        raise HTTPException(status_code=501, detail="Each worker process has its own result cache with PII_API_EXECUTOR=process, so cache stats are unavailable.")
+    return JSONResponse(content=get_result_cache().stats())
+
+@app.get('/metrics')
+def metrics():
+    return Response(content=render_metrics(), headers={"Content-Type": CONTENT_TYPE})
+
 #uvicorn app_FastAPI:app --reload
@@ -1,13 +1,56 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from pii_identifier import main
+import json
+import time
+from metrics import CONTENT_TYPE, observe_timings, render_metrics, timed_call
+from pii_identifier import analyze_ndjson_line, check_detect_condition, check_output_mode, get_upload_type, iter_redacted_text, main, main_batch
+from result_cache import get_result_cache
  
 app = Flask(__name__)
 CORS(app)
  
+def is_requested(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+def build_timed_response(content, timings, include_timings=False):
+    """
+    Encodes a JSON response, recording the encoding time and the request's stage timings.
+
+    Parameters:
+    - content: Response content.
+    - timings (dict): Timings block of the request, completed with the encoding time.
+    - include_timings (bool): Whether to add the timings block to the response.
+
+    Returns:
+    - Response: Encoded response.
+    """
+    start = time.perf_counter()
+    response = jsonify(content)
+    timings["encoding"] = time.perf_counter() - start
+    observe_timings(timings)
+
+    if include_timings and isinstance(content, dict):
+        response = jsonify({**content, "timings": timings})
+    return response
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def prepare_upload(input_file):
+    """
+    Turns an upload into input arguments for main().
+
+    Werkzeug has already spooled the upload, to memory or to a temporary file when it
+    is large, so its seekable stream is analyzed in place instead of being copied again.
+
+    Parameters:
+    - input_file (FileStorage): The upload.
+
+    Returns:
+    - dict: input_buffer and input_type arguments for main().
+    """
+    return {"input_buffer": input_file.stream, "input_type": get_upload_type(input_file.filename)}
+
 @app.route('/extract_entities', methods=['POST'])
 def extract_entities():
     try:
@@ -19,12 +62,27 @@ def extract_entities():
         input_file_path = data.get('input_file_path', None)
         input_text = data.get('input_text', None)
         entities_to_extract = data.get('entities_to_extract', [])
+        output_mode = data.get('output_mode', 'values')
+        detect_condition = data.get('detect_condition', 'any')
+        input_file = request.files.get('input_file')
+        # Form fields carry the list as JSON text
+        if isinstance(entities_to_extract, str):
+            entities_to_extract = json.loads(entities_to_extract)
  
-        if input_file_path is None and input_text is None:
+        if input_file_path is None and input_text is None and input_file is None:
             return jsonify({"error": "Either 'input_file_path' or 'input_text' must be provided."}), 400
+        try:
+            check_output_mode(output_mode)
+            check_detect_condition(detect_condition)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
  
-        results = main(input_file_path=input_file_path, input_text=input_text, entities_to_extract=entities_to_extract)
-        print(results)
+        # An uploaded file is analyzed where Werkzeug spooled it
+        upload_input = {}
+        if input_file is not None:
+            upload_input = prepare_upload(input_file)
+ 
+        results, timings = timed_call(main, input_file_path=input_file_path, input_text=input_text, entities_to_extract=entities_to_extract, output_mode=output_mode, detect_condition=detect_condition, **upload_input)
         # entities = {
         #     'PERSON_NAME': results.get('PERSON_NAME', {}).get('recognized_values', []),
         #     'TITLES': results.get('TITLES', {}).get('recognized_values', []),
@@ -46,11 +104,102 @@ def extract_entities():
         #     'AAA_NUMBERS': results.get('AAA_NUMBERS', {}).get('recognized_values', [])
         # }
  
-        return jsonify(results)
+        return build_timed_response(results, timings, is_requested(data.get('include_timings', False)))
    
     except Exception as e:
         print(f"An error occurred in the main function: {e}")
         return {"error": str(e)}
  
+@app.route('/extract_entities/batch', methods=['POST'])
+def extract_entities_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+ 
+        input_texts = data.get('input_texts', None)
+        entities_to_extract = data.get('entities_to_extract', [])
+        output_mode = data.get('output_mode', 'values')
+        detect_condition = data.get('detect_condition', 'any')
+ 
+        if not isinstance(input_texts, list):
+            return jsonify({"error": "'input_texts' must be a JSON array of texts."}), 400
+        try:
+            check_output_mode(output_mode)
+            check_detect_condition(detect_condition)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+ 
+        results, timings = timed_call(main_batch, input_texts=input_texts, entities_to_extract=entities_to_extract, output_mode=output_mode, detect_condition=detect_condition)
+ 
+        if isinstance(results, dict) and "error" in results:
+            return jsonify(results), 500
+ 
+        return build_timed_response({"results": results}, timings, is_requested(data.get('include_timings', False)))
+ 
+    except Exception as e:
+        print(f"An error occurred in the main_batch function: {e}")
+        return {"error": str(e)}
+ 
+@app.route('/redact', methods=['POST'])
+def redact_entities():
+    if request.is_json:
+        data = request.get_json()
+    else:
+        data = request.form.to_dict()
+
+    input_file_path = data.get('input_file_path', None)
+    upload_input = {}
+    input_file = request.files.get('input_file')
+    try:
+        entities_to_extract = data.get('entities_to_extract', [])
+        operators = data.get('operators', {})
+        # Form fields carry the lists as JSON text
+        if isinstance(entities_to_extract, str):
+            entities_to_extract = json.loads(entities_to_extract)
+        if isinstance(operators, str):
+            operators = json.loads(operators)
+
+        if input_file is not None:
+            upload_input = prepare_upload(input_file)
+
+        redacted_parts = iter_redacted_text(
+            input_file_path=input_file_path,
+            input_text=data.get('input_text', None),
+            entities_to_extract=entities_to_extract,
+            operators=operators,
+            **upload_input
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The redacted text is sent as it is produced
+    return Response(stream_with_context(redacted_parts), content_type="text/plain; charset=utf-8")
+ 
+@app.route('/extract_entities/stream', methods=['POST'])
+def extract_entities_stream():
+    try:
+        entities_to_extract = json.loads(request.args.get('entities_to_extract', '[]'))
+        output_mode = request.args.get('output_mode', 'values')
+        detect_condition = request.args.get('detect_condition', 'any')
+        check_output_mode(output_mode)
+        check_detect_condition(detect_condition)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        # Each line is read from the body and answered before the next one is read
+        for line_number, line in enumerate(request.stream, start=1):
+            if line.strip():
+                yield analyze_ndjson_line(line, line_number, entities_to_extract, output_mode, detect_condition)
+
+    return Response(stream_with_context(generate()), content_type="application/x-ndjson")
+ 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_result_cache().stats())
+ 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+ 
 if __name__ == '__main__':
     app.run(debug=False)
\ No newline at end of file
@@ -0,0 +1,663 @@
+"""
+Benchmarks the recognizers and main() on synthetic corpora.
+
+Every recognizer and main() with all entities are timed on corpora of several
+sizes and PII densities. Warm numbers come from repeated runs in this process
+after the models are loaded; cold-start numbers come from a fresh interpreter
+per target, which pays for the imports and model loads on its first call.
+
+Results are written as JSON, for example:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --sizes 1KB,100KB --densities 0.05 --repeat 5
+
+The time to import pii_identifier is checked against a budget with:
+
+    python benchmark.py --check-import-budget
+
+The date engines are compared on 1 MB of synthetic logs, or on log files, with:
+
+    python benchmark.py --dates
+    python benchmark.py --dates --date-corpus logs/app-1.log --date-corpus logs/app-2.log
+"""
+from collections import Counter
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# Warm runs must do the full work every time, not read the result cache
+os.environ["PII_CACHE_MAX_BYTES"] = "0"
+
+BENCHMARK_FORMAT_VERSION = 1
+
+DEFAULT_SIZES = ["1KB", "100KB", "10MB"]
+# Share of the corpus words that are PII
+DEFAULT_DENSITIES = [0.01, 0.05, 0.2]
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 7
+# Corpus used for the cold-start runs
+COLD_START_SIZE = "1KB"
+COLD_START_DENSITY = 0.05
+
+# Importing pii_identifier must stay within this many seconds and must not load these modules,
+# which are only imported once a recognizer or extractor needs them
+IMPORT_TIME_BUDGET = float(os.environ.get("PII_IMPORT_TIME_BUDGET", 0.3))
+IMPORT_RUNS = 5
+HEAVY_MODULES = ["presidio_analyzer", "presidio_anonymizer", "spacy", "fitz", "docx", "datefinder", "Deny_List"]
+IMPORT_PROBE = (
+    "import json, sys, time; start = time.perf_counter(); import pii_identifier; "
+    "elapsed = time.perf_counter() - start; print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))"
+)
+
+# Benchmark targets and the entity main() reports them as, or None for recognizers main() does not offer
+RECOGNIZER_TARGETS = {
+    "person_recognizer": "PERSON_NAME",
+    "title_recognizer": "TITLES",
+    "date_recognizer": "DATES",
+    "citizenship_recognizer": "CITIZENSHIP",
+    "email_recognizer": "EMAIL",
+    "organizations_recognizer": "ORGANIZATION",
+    "location_recognizer": "LOCATION",
+    "phone_number_recognizer": "PHONE_NUMBER",
+    "criminal_history_recognizer": "CRIMINAL_HISTORY",
+    "religious_affiliations_recognizer": "RELIGIOUS_AFFLICATION",
+    "medical_history_recognizer": "MEDICAL_HISTORY",
+    "sexual_orientation_recognizer": "SEXUAL_ORIENTATION",
+    "tax_id_recognizer": "TAX_ID",
+    "driver_license_recognizer": "DRIVER_LICENSE",
+    "biometric_identifier_recognizer": "BIOMETERIC_IDENTIFIER",
+    "patient_id_recognizer": "PATIENT_ID",
+    "genders_recognizer": "GENDERS",
+    "AAA_no_recognizer": "AAA_NUMBERS",
+    "financial_account_recognizer": None,
+    "dob_recognizer": None
+}
+MAIN_TARGET = "main"
+
+FILLER_WORDS = (
+    "the of and to in was with on for that report notes account reviewed customer meeting "
+    "request follow up service record update team policy review schedule office visit"
+).split()
+
+# Values the pattern, date and spaCy based recognizers pick up
+PII_SAMPLES = [
+    "123-45-6789", "12-34-5678-9012", "ABC-12345-X9", "A1B-2C3D4E-F5G", "ABCDEFGHIJ",
+    "1234 5678 9012 3456", "1990-01-02", "(555) 123-4567", "jane.doe@example.org",
+    "44 Elm Road", "Springfield City", "John Smith", "Maria Garcia", "Acme Corporation",
+    "General Motors", "Paris", "March 3, 2020", "12 January 2019"
+]
+
+SENTENCE_ENDINGS = [".", ".\n", ",", ";"]
+
+# Date engines compared by --dates, and the size of their synthetic log corpus
+DATE_ENGINES = ["datefinder", "fast"]
+DATE_LOG_SIZE = "1MB"
+LOG_LEVELS = ["DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR"]
+
+# Detect mode is compared with a full extraction of the same entities, on clean and on PII-bearing corpora
+DETECT_ENTITIES = ["TAX_ID", "MEDICAL_HISTORY"]
+DETECT_SIZES = ["100KB", "1MB"]
+DETECT_DENSITIES = [0.0, 0.05]
+
+
+def parse_size(size):
+    """
+    Converts a size such as "100KB" or "10MB" to bytes.
+
+    Parameters:
+    - size (str): Number followed by B, KB, MB or GB.
+
+    Returns:
+    - int: Size in bytes.
+    """
+    units = {"GB": 1024 ** 3, "MB": 1024 ** 2, "KB": 1024, "B": 1}
+    size = size.strip().upper()
+    for unit, factor in units.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+def load_pii_vocabulary():
+    """
+    Collects PII terms for the synthetic corpora from the deny-lists and the sample values.
+
+    Returns:
+    - list: PII terms.
+    """
+    from deny_list_matcher import load_deny_lists
+
+    vocabulary = list(PII_SAMPLES)
+    for terms in load_deny_lists().values():
+        vocabulary.extend(term for term in terms if term)
+    return vocabulary
+
+
+def generate_corpus(size_bytes, density, seed=DEFAULT_SEED, vocabulary=None):
+    """
+    Generates a reproducible synthetic text of about the given size.
+
+    Parameters:
+    - size_bytes (int): Target size of the UTF-8 encoded text.
+    - density (float): Share of words drawn from the PII vocabulary.
+    - seed (int): Random seed.
+    - vocabulary (list): PII terms. Loaded from the deny-lists when None.
+
+    Returns:
+    - str: Synthetic text of at most size_bytes bytes.
+    """
+    vocabulary = vocabulary or load_pii_vocabulary()
+    rng = random.Random(f"{seed}:{size_bytes}:{density}")
+
+    words = []
+    length = 0
+    while length < size_bytes:
+        word = rng.choice(vocabulary) if rng.random() < density else rng.choice(FILLER_WORDS)
+        if rng.random() < 0.08:
+            word += rng.choice(SENTENCE_ENDINGS)
+        words.append(word)
+        length += len(word.encode("utf-8")) + 1
+
+    text = " ".join(words).encode("utf-8")[:size_bytes]
+    return text.decode("utf-8", "ignore")
+
+
+def generate_log_corpus(size_bytes, seed=DEFAULT_SEED):
+    """
+    Generates reproducible log lines: timestamps, ids, amounts and durations, with an occasional written date.
+
+    Parameters:
+    - size_bytes (int): Target size of the text.
+    - seed (int): Random seed.
+
+    Returns:
+    - str: Log text of at most size_bytes bytes.
+    """
+    rng = random.Random(f"{seed}:logs:{size_bytes}")
+
+    lines = []
+    length = 0
+    while length < size_bytes:
+        line = (
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:"
+            f"{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}Z {rng.choice(LOG_LEVELS)} worker-{rng.randint(1, 16)} "
+            f"order={rng.randint(10000, 99999)} invoice=INV-{rng.randint(1000, 9999)} "
+            f"amount={rng.randint(1, 9999)}.{rng.randint(0, 99):02d} qty={rng.randint(1, 50)} took {rng.randint(1, 999)}ms"
+        )
+        if rng.random() < 0.1:
+            line += f" due {rng.randint(1, 12)}/{rng.randint(1, 28)}/2024"
+        if rng.random() < 0.05:
+            line += f" shipped on {rng.choice(['March', 'Apr', 'June', 'Sept.'])} {rng.randint(1, 28)}, 2023"
+        lines.append(line)
+        length += len(line) + 1
+
+    return "\n".join(lines)[:size_bytes]
+
+
+def get_date_engine(name):
+    """
+    Returns a callable that finds the dates of a text with one date engine.
+
+    Parameters:
+    - name (str): One of DATE_ENGINES.
+
+    Returns:
+    - callable: Function taking the text and returning the dates formatted as "%b %d, %Y".
+    """
+    if name == "datefinder":
+        import datefinder
+
+        return lambda text: [found.strftime("%b %d, %Y") for found in datefinder.find_dates(text)]
+
+    from date_engine import find_dates, format_date
+
+    return lambda text: [format_date(found) for found, _, _ in find_dates(text)]
+
+
+def run_date_benchmark(corpus_paths=None, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED):
+    """
+    Compares the date engines on log corpora.
+
+    Parameters:
+    - corpus_paths (list): Log files to use. A synthetic DATE_LOG_SIZE log is generated when empty.
+    - repeat (int): Number of timed runs per engine and corpus.
+    - seed (int): Random seed of the synthetic log.
+
+    Returns:
+    - dict: Latency and dates found per engine for each corpus, and how many dates the engines agree on.
+    """
+    if corpus_paths:
+        corpora = []
+        for path in corpus_paths:
+            with open(path, encoding="utf-8", errors="replace") as corpus_file:
+                corpora.append((path, corpus_file.read()))
+    else:
+        corpora = [(f"synthetic-logs-{DATE_LOG_SIZE}", generate_log_corpus(parse_size(DATE_LOG_SIZE), seed))]
+
+    report = {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "environment": collect_environment(),
+        "config": {"engines": DATE_ENGINES, "repeat": repeat, "seed": seed},
+        "corpora": []
+    }
+
+    for name, text in corpora:
+        result = {"corpus": name, "bytes": len(text.encode("utf-8")), "engines": {}}
+        found = {}
+        for engine in DATE_ENGINES:
+            print(f"dates: {engine} on {name}", file=sys.stderr)
+            function = get_date_engine(engine)
+            timings = []
+            for _ in range(repeat):
+                elapsed, found[engine] = time_call(function, text)
+                timings.append(elapsed)
+            result["engines"][engine] = summarize_timings(timings, result["bytes"])
+            result["engines"][engine]["dates_found"] = len(found[engine])
+
+        # Dates are compared by value, since the engines report slightly different spans
+        datefinder_dates, fast_dates = Counter(found["datefinder"]), Counter(found["fast"])
+        result["agreement"] = {
+            "both": sum((datefinder_dates & fast_dates).values()),
+            "datefinder_only": sum((datefinder_dates - fast_dates).values()),
+            "fast_only": sum((fast_dates - datefinder_dates).values())
+        }
+        datefinder_median = result["engines"]["datefinder"]["latency_seconds"]["median"]
+        fast_median = result["engines"]["fast"]["latency_seconds"]["median"]
+        result["speedup"] = datefinder_median / fast_median if fast_median else None
+        report["corpora"].append(result)
+
+    return report
+
+
+def run_detect_benchmark(entities=None, sizes=None, densities=None, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED):
+    """
+    Compares detect mode with a full extraction of the same entities.
+
+    Parameters:
+    - entities (list): Entity names to check for. Defaults to DETECT_ENTITIES.
+    - sizes (list): Corpus sizes such as "100KB". Defaults to DETECT_SIZES.
+    - densities (list): PII densities of the corpora; 0 gives clean corpora. Defaults to DETECT_DENSITIES.
+    - repeat (int): Number of timed runs per mode and corpus.
+    - seed (int): Random seed of the corpora.
+
+    Returns:
+    - dict: Latency of each mode per corpus, the detection results and the speedup over the full extraction.
+    """
+    import pii_identifier
+
+    entities = entities or DETECT_ENTITIES
+    sizes = sizes or DETECT_SIZES
+    densities = DETECT_DENSITIES if densities is None else densities
+    modes = {
+        "values": {"output_mode": "values"},
+        "detect_any": {"output_mode": "detect", "detect_condition": "any"},
+        "detect_all": {"output_mode": "detect", "detect_condition": "all"}
+    }
+
+    report = {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "environment": collect_environment(),
+        "config": {"entities": entities, "sizes": sizes, "densities": densities, "repeat": repeat, "seed": seed},
+        "corpora": []
+    }
+
+    vocabulary = load_pii_vocabulary()
+    for size in sizes:
+        for density in densities:
+            text = generate_corpus(parse_size(size), density, seed, vocabulary)
+            result = {"size": size, "density": density, "bytes": len(text.encode("utf-8")), "modes": {}}
+            for mode, options in modes.items():
+                print(f"detect: {mode} on {size} at density {density}", file=sys.stderr)
+                function = lambda text, options=options: pii_identifier.main(input_text=text, entities_to_extract=entities, **options)
+                function(text)
+                timings = []
+                for _ in range(repeat):
+                    elapsed, output = time_call(function, text)
+                    timings.append(elapsed)
+                result["modes"][mode] = summarize_timings(timings, result["bytes"])
+                if "detected" in output:
+                    result["modes"][mode]["detected"] = output["detected"]
+                else:
+                    result["modes"][mode]["recognized_values"] = count_values(output)
+
+            values_median = result["modes"]["values"]["latency_seconds"]["median"]
+            result["speedup"] = {
+                mode: values_median / result["modes"][mode]["latency_seconds"]["median"]
+                for mode in ["detect_any", "detect_all"] if result["modes"][mode]["latency_seconds"]["median"]
+            }
+            report["corpora"].append(result)
+
+    return report
+
+
+def get_target(name):
+    """
+    Returns a callable that runs one benchmark target on a text.
+
+    Parameters:
+    - name (str): Recognizer function name, or "main" for main() with all entities.
+
+    Returns:
+    - callable: Function taking the text and returning the results.
+    """
+    import pii_identifier
+
+    if name == MAIN_TARGET:
+        entities = list(pii_identifier.ENTITY_TYPES)
+        return lambda text: pii_identifier.main(input_text=text, entities_to_extract=entities)
+    return getattr(pii_identifier, name)
+
+
+def count_values(result):
+    """
+    Counts the values a target recognized, so runs can be sanity-checked.
+
+    Parameters:
+    - result (dict): Output of a recognizer or of main().
+
+    Returns:
+    - int: Number of recognized values, or None when there is no usable result.
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return None
+    if "recognized_values" in result:
+        return len(result["recognized_values"])
+    return sum(len(output.get("recognized_values", [])) for output in result.values())
+
+
+def time_call(function, text):
+    """
+    Times one call of a target.
+
+    Parameters:
+    - function (callable): Target to run.
+    - text (str): Input text.
+
+    Returns:
+    - tuple: Elapsed seconds and the target's result.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = function(text)
+    return time.perf_counter() - start, result
+
+
+def summarize_timings(timings, size):
+    """
+    Summarizes the timed runs of a target.
+
+    Parameters:
+    - timings (list): Elapsed seconds of each run.
+    - size (int): Input size in bytes.
+
+    Returns:
+    - dict: Latency statistics and throughput.
+    """
+    median = statistics.median(timings)
+    return {
+        "runs": len(timings),
+        "latency_seconds": {
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.mean(timings),
+            "max": max(timings)
+        },
+        "throughput_bytes_per_second": size / median if median else None
+    }
+
+
+def run_warm(name, text, repeat):
+    """
+    Measures a target after one untimed warm-up call.
+
+    Parameters:
+    - name (str): Target name.
+    - text (str): Input text.
+    - repeat (int): Number of timed runs.
+
+    Returns:
+    - dict: Latency statistics, throughput and the number of recognized values.
+    """
+    function = get_target(name)
+    try:
+        # Recognizers log their errors and return None, main() returns an error dictionary
+        result = function(text)
+        if count_values(result) is None:
+            error = result.get("error") if isinstance(result, dict) else None
+            return {"error": error or "no result, see app.log"}
+
+        timings = []
+        for _ in range(repeat):
+            elapsed, result = time_call(function, text)
+            timings.append(elapsed)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    summary = summarize_timings(timings, len(text.encode("utf-8")))
+    summary["recognized_values"] = count_values(result)
+    return summary
+
+
+def run_cold_start(name, seed):
+    """
+    Measures a target's first call in a fresh interpreter.
+
+    Parameters:
+    - name (str): Target name.
+    - seed (int): Random seed of the cold-start corpus.
+
+    Returns:
+    - dict: Import time, first call time and, for comparison, second call time.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--cold-target", name, "--seed", str(seed)]
+    completed = subprocess.run(
+        command, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_import(runs=IMPORT_RUNS, budget=IMPORT_TIME_BUDGET):
+    """
+    Measures the time to import pii_identifier in fresh interpreters.
+
+    Parameters:
+    - runs (int): Number of fresh interpreters to measure.
+    - budget (float): Import time budget in seconds, compared with the median.
+
+    Returns:
+    - dict: Import time statistics, the heavy modules the import loaded and whether it stayed within budget.
+    """
+    timings = []
+    heavy_modules = set()
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(probe["seconds"])
+        heavy_modules.update(module for module in probe["modules"] if module.split(".")[0] in HEAVY_MODULES)
+
+    median = statistics.median(timings)
+    heavy_modules = sorted({module.split(".")[0] for module in heavy_modules})
+    return {
+        "runs": runs,
+        "seconds": {"min": min(timings), "median": median, "max": max(timings)},
+        "budget_seconds": budget,
+        "heavy_modules_loaded": heavy_modules,
+        "within_budget": median <= budget and not heavy_modules
+    }
+
+
+def measure_cold_target(name, seed):
+    """
+    Runs inside the fresh interpreter started by run_cold_start().
+
+    Parameters:
+    - name (str): Target name.
+    - seed (int): Random seed of the cold-start corpus.
+
+    Returns:
+    - dict: Import time, first call time and second call time in seconds.
+    """
+    text = generate_corpus(parse_size(COLD_START_SIZE), COLD_START_DENSITY, seed)
+
+    start = time.perf_counter()
+    function = get_target(name)
+    import_seconds = time.perf_counter() - start
+
+    first_call_seconds, _ = time_call(function, text)
+    second_call_seconds, _ = time_call(function, text)
+    return {
+        "import_seconds": import_seconds,
+        "first_call_seconds": first_call_seconds,
+        "second_call_seconds": second_call_seconds
+    }
+
+
+def collect_environment():
+    """
+    Describes the machine and library versions the benchmark ran with.
+
+    Returns:
+    - dict: Environment details.
+    """
+    import spacy
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "spacy": spacy.__version__
+    }
+
+
+def run_benchmarks(targets, sizes, densities, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED, cold=True):
+    """
+    Runs the benchmark suite.
+
+    Parameters:
+    - targets (list): Target names.
+    - sizes (list): Corpus sizes such as "1KB".
+    - densities (list): PII densities of the corpora.
+    - repeat (int): Number of timed warm runs per target and corpus.
+    - seed (int): Random seed of the corpora.
+    - cold (bool): Whether to measure cold starts.
+
+    Returns:
+    - dict: Benchmark report.
+    """
+    report = {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "environment": collect_environment(),
+        "config": {
+            "targets": targets,
+            "sizes": sizes,
+            "densities": densities,
+            "repeat": repeat,
+            "seed": seed,
+            "cold_start_corpus": {"size": COLD_START_SIZE, "density": COLD_START_DENSITY}
+        },
+        "import": None,
+        "cold_start": {},
+        "warm": []
+    }
+
+    if cold:
+        print("import time", file=sys.stderr)
+        report["import"] = measure_import()
+        for name in targets:
+            print(f"cold start: {name}", file=sys.stderr)
+            report["cold_start"][name] = run_cold_start(name, seed)
+
+    vocabulary = load_pii_vocabulary()
+    for size in sizes:
+        for density in densities:
+            text = generate_corpus(parse_size(size), density, seed, vocabulary)
+            corpus_bytes = len(text.encode("utf-8"))
+            for name in targets:
+                print(f"warm: {name} on {size} at density {density}", file=sys.stderr)
+                result = {"target": name, "size": size, "density": density, "bytes": corpus_bytes}
+                result.update(run_warm(name, text, repeat))
+                report["warm"].append(result)
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PII recognizers and main().")
+    parser.add_argument("--targets", default=",".join(list(RECOGNIZER_TARGETS) + [MAIN_TARGET]),
+                        help="Comma-separated recognizer function names and/or 'main'.")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="Comma-separated corpus sizes, e.g. 1KB,100KB,10MB.")
+    parser.add_argument("--densities", default=",".join(str(density) for density in DEFAULT_DENSITIES),
+                        help="Comma-separated shares of PII words in the corpora.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed warm runs per target and corpus.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed of the synthetic corpora.")
+    parser.add_argument("--no-cold", action="store_true", help="Skip the cold-start runs.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--check-import-budget", action="store_true",
+                        help="Only measure the import time of pii_identifier and exit with an error if it exceeds the budget.")
+    parser.add_argument("--dates", action="store_true",
+                        help="Only compare the date engines on log corpora.")
+    parser.add_argument("--date-corpus", action="append", default=[],
+                        help="Log file for --dates; repeat for several. Defaults to a synthetic 1 MB log.")
+    parser.add_argument("--detect", action="store_true",
+                        help="Only compare detect mode with a full extraction, on clean and PII-bearing corpora.")
+    parser.add_argument("--detect-entities", default=",".join(DETECT_ENTITIES),
+                        help="Comma-separated entity names for --detect.")
+    parser.add_argument("--cold-target", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.cold_target:
+        print(json.dumps(measure_cold_target(args.cold_target, args.seed)))
+        sys.exit(0)
+
+    if args.check_import_budget:
+        result = measure_import()
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["within_budget"] else 1)
+
+    if args.dates:
+        report = run_date_benchmark(args.date_corpus, repeat=args.repeat, seed=args.seed)
+    elif args.detect:
+        report = run_detect_benchmark(
+            [entity.strip() for entity in args.detect_entities.split(",") if entity.strip()],
+            repeat=args.repeat,
+            seed=args.seed
+        )
+    else:
+        targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+        unknown = [target for target in targets if target != MAIN_TARGET and target not in RECOGNIZER_TARGETS]
+        if unknown:
+            sys.exit(f"Unknown benchmark targets: {', '.join(unknown)}")
+
+        report = run_benchmarks(
+            targets,
+            [size.strip() for size in args.sizes.split(",") if size.strip()],
+            [float(density) for density in args.densities.split(",") if density.strip()],
+            repeat=args.repeat,
+            seed=args.seed,
+            cold=not args.no_cold
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
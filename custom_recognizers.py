@@ -0,0 +1,99 @@
+from presidio_analyzer import EntityRecognizer, RecognizerResult
+
+from deny_list_matcher import find_deny_list_matches
+from pattern_scanner import PATTERN_ENTITY_TYPES, scan_patterns
+
+
+#Deny-list recognizer
+class DenyListRecognizer(EntityRecognizer):
+    """
+    Recognizes every Deny_List.py vocabulary in a single pass over the text.
+
+    The terms are matched with a shared Aho-Corasick automaton instead of one
+    regex alternation per list, so scanning cost does not grow with the number
+    of terms. Hits score like presidio deny-list matches.
+    """
+
+    def __init__(self, automaton, score=1.0):
+        self.automaton = automaton
+        self.score = score
+        super().__init__(supported_entities=list(automaton["categories"]), name="DenyListRecognizer")
+
+    def load(self):
+        pass
+
+    def analyze(self, text, entities, nlp_artifacts=None):
+        """
+        Finds deny-list hits for the requested entities.
+
+        Parameters:
+        - text (str): Input text.
+        - entities (list): Entity types to look for.
+        - nlp_artifacts (NlpArtifacts): Unused.
+
+        Returns:
+        - list: RecognizerResult for every hit.
+        """
+        categories = [entity for entity in entities if entity in self.supported_entities]
+
+        results = []
+        for start, end, entity_type in find_deny_list_matches(self.automaton, text, categories):
+            results.append(RecognizerResult(
+                entity_type=entity_type,
+                start=start,
+                end=end,
+                score=self.score,
+                recognition_metadata={
+                    RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                    RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id
+                }
+            ))
+
+        return results
+
+
+#Fused pattern recognizer
+class FusedPatternRecognizer(EntityRecognizer):
+    """
+    Recognizes every pattern-based entity with one fused regex scan.
+
+    See pattern_scanner.PATTERN_DEFINITIONS for the patterns and the policy
+    applied when they overlap.
+    """
+
+    def __init__(self):
+        super().__init__(supported_entities=list(PATTERN_ENTITY_TYPES), name="FusedPatternRecognizer")
+
+    def load(self):
+        pass
+
+    def analyze(self, text, entities, nlp_artifacts=None):
+        """
+        Finds pattern matches for the requested entities.
+
+        Parameters:
+        - text (str): Input text.
+        - entities (list): Entity types to look for.
+        - nlp_artifacts (NlpArtifacts): Unused.
+
+        Returns:
+        - list: RecognizerResult for every match.
+        """
+        entity_types = [entity for entity in entities if entity in self.supported_entities]
+        if not entity_types:
+            return []
+
+        results = []
+        for start, end, entity_type, score in scan_patterns(text, entity_types):
+            results.append(RecognizerResult(
+                entity_type=entity_type,
+                start=start,
+                end=end,
+                score=score,
+                recognition_metadata={
+                    RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                    RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id
+                }
+            ))
+
+        return results
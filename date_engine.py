@@ -0,0 +1,201 @@
+from datetime import date
+from functools import lru_cache
+import os
+import re
+
+# Formats the engine recognizes, in strftime notation, tried in this order at each position.
+# %b and %B both accept full and abbreviated month names, and %d accepts an ordinal suffix
+# such as "3rd". Numeric dates are read month first, like datefinder reads them.
+DEFAULT_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%m.%d.%Y",
+    "%B %d, %Y",
+    "%B %d %Y",
+    "%d %B, %Y",
+    "%d %B %Y",
+    "%d of %B %Y",
+    "%m/%d/%y"
+]
+
+# Shared date-format list, replaceable with a ";"-separated list of formats
+DATE_FORMATS = [
+    date_format.strip() for date_format in os.environ.get("PII_DATE_FORMATS", ";".join(DEFAULT_DATE_FORMATS)).split(";")
+    if date_format.strip()
+]
+
+DATE_OUTPUT_FORMAT = "%b %d, %Y"
+
+MONTH_NAMES = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12
+}
+
+# Longest names first, so "March" is not matched as "Mar"
+_MONTH_NAME_PATTERN = "|".join(sorted(MONTH_NAMES, key=len, reverse=True))
+
+# Regex of each strftime directive, with the name of the field it fills
+DIRECTIVES = {
+    "Y": ("year", r"\d{4}"),
+    "y": ("short_year", r"\d{2}"),
+    "m": ("month", r"1[0-2]|0?[1-9]"),
+    "d": ("day", r"(?:3[01]|[12]\d|0?[1-9])(?:st|nd|rd|th)?"),
+    "B": ("month_name", rf"(?:{_MONTH_NAME_PATTERN})\.?(?![a-z])"),
+    "b": ("month_name", rf"(?:{_MONTH_NAME_PATTERN})\.?(?![a-z])")
+}
+
+# Fields every format must capture, each met by any one of its alternatives
+REQUIRED_FIELDS = [("day",), ("month", "month_name"), ("year", "short_year")]
+
+_ORDINAL_SUFFIX = re.compile(r"(?:st|nd|rd|th)$", re.IGNORECASE)
+
+
+def _format_to_regex(date_format, index):
+    """
+    Translates a strftime format into a regex with one named group per field.
+
+    Parameters:
+    - date_format (str): Format such as "%B %d, %Y".
+    - index (int): Position of the format in the list, which makes its group names unique.
+
+    Returns:
+    - str: Regex of the format, wrapped in a group named after the format index.
+    """
+    parts = []
+    position = 0
+    while position < len(date_format):
+        character = date_format[position]
+        if character == "%" and position + 1 < len(date_format):
+            directive = date_format[position + 1]
+            if directive not in DIRECTIVES:
+                raise ValueError(f"Unsupported directive %{directive} in date format {date_format!r}")
+            field, regex = DIRECTIVES[directive]
+            parts.append(f"(?P<f{index}_{field}>{regex})")
+            position += 2
+        elif character == " ":
+            parts.append(r"\s+")
+            position += 1
+        else:
+            parts.append(re.escape(character))
+            position += 1
+
+    return f"(?P<f{index}>{''.join(parts)})"
+
+
+@lru_cache(maxsize=8)
+def compile_date_pattern(date_formats):
+    """
+    Compiles the formats into one pattern that finds every candidate in a single scan.
+
+    Parameters:
+    - date_formats (tuple): Formats in strftime notation.
+
+    Returns:
+    - tuple: Fused pattern, whose matches name the format they matched in lastgroup,
+      and the field groups of each format as (field, group number) pairs.
+
+    Raises:
+    - ValueError: If a format has an unsupported directive or lacks a day, month or year.
+    """
+    alternatives = "|".join(_format_to_regex(date_format, index) for index, date_format in enumerate(date_formats))
+    # Candidates may not start inside a word or number, or end inside a number
+    pattern = re.compile(rf"(?<![A-Za-z0-9])(?:{alternatives})(?!\d)", re.IGNORECASE)
+
+    format_fields = {f"f{index}": [] for index in range(len(date_formats))}
+    for name, group in pattern.groupindex.items():
+        format_group, _, field = name.partition("_")
+        if field:
+            format_fields[format_group].append((field, group))
+
+    for index, date_format in enumerate(date_formats):
+        fields = {field for field, _ in format_fields[f"f{index}"]}
+        for alternatives in REQUIRED_FIELDS:
+            if not fields.intersection(alternatives):
+                raise ValueError(f"Date format {date_format!r} has no {' or '.join(alternatives)} field")
+    return pattern, format_fields
+
+
+def parse_match(match, format_fields):
+    """
+    Builds the date of a candidate from the fields its format captured.
+
+    Parameters:
+    - match (re.Match): Match of the fused pattern.
+    - format_fields (dict): Field groups of each format, from compile_date_pattern().
+
+    Returns:
+    - datetime.date: The date, or None when the fields do not make a valid date.
+    """
+    fields = {field: match.group(group) for field, group in format_fields[match.lastgroup]}
+
+    if "year" in fields:
+        year = int(fields["year"])
+    else:
+        # Two-digit years follow strptime: 69-99 are 1900s, 00-68 are 2000s
+        short_year = int(fields["short_year"])
+        year = short_year + (1900 if short_year >= 69 else 2000)
+
+    if "month" in fields:
+        month = int(fields["month"])
+    else:
+        month = MONTH_NAMES[fields["month_name"].rstrip(".").lower()]
+
+    day = int(_ORDINAL_SUFFIX.sub("", fields["day"]))
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def find_dates(text, date_formats=None):
+    """
+    Finds the dates in a text with one scan of precompiled patterns.
+
+    Parameters:
+    - text (str): Input text.
+    - date_formats (list): Formats to recognize. Defaults to DATE_FORMATS.
+
+    Returns:
+    - list: (date, start, end) tuples in text order, with the offsets of the date text.
+    """
+    pattern, format_fields = compile_date_pattern(tuple(DATE_FORMATS if date_formats is None else date_formats))
+
+    dates = []
+    for match in pattern.finditer(text):
+        found = parse_match(match, format_fields)
+        if found is not None:
+            dates.append((found, match.start(), match.end()))
+
+    return dates
+
+
+def contains_date(text, date_formats=None):
+    """
+    Checks whether a text holds a date, stopping at the first one.
+
+    Parameters:
+    - text (str): Input text.
+    - date_formats (list): Formats to recognize. Defaults to DATE_FORMATS.
+
+    Returns:
+    - bool: Whether find_dates() would find a date.
+    """
+    pattern, format_fields = compile_date_pattern(tuple(DATE_FORMATS if date_formats is None else date_formats))
+    return any(parse_match(match, format_fields) is not None for match in pattern.finditer(text))
+
+
+def format_date(found):
+    """
+    Formats a date like the date recognizer reports it.
+
+    Parameters:
+    - found (datetime.date): Date.
+
+    Returns:
+    - str: Date formatted as "%b %d, %Y".
+    """
+    return found.strftime(DATE_OUTPUT_FORMAT)
@@ -0,0 +1,366 @@
+from collections import deque
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Deny_List.py variables, keyed by the entity type their hits are reported as
+DENY_LIST_NAMES = {
+    "CITIZENSHIP": "citizenship_immigration_terms",
+    "PERSON": "female_names",
+    "CRIMINAL HISTORY": "criminal_history_deny_list",
+    "RELIGIOUS AFFILIATION": "religious_affiliations",
+    "SEXUAL ORIENTATION": "identity_terms",
+    "MEDICAL HISTORY": "medical_history_deny_list",
+    "GENDER": "genders",
+    "TITLE": "title_denylist"
+}
+
+DENY_LIST_MODULE = "Deny_List"
+
+# Bump whenever the automaton layout changes, so stale artifacts are rebuilt
+ARTIFACT_FORMAT_VERSION = 2
+ARTIFACT_PATH = os.environ.get(
+    "PII_DENY_LIST_ARTIFACT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "deny_list.automaton")
+)
+
+_WORD_CHAR = re.compile(r"\w")
+
+def _fold_case(text):
+    """
+    Lower-cases text without changing its length, so offsets into the folded
+    text are offsets into the original text.
+
+    Parameters:
+    - text (str): Text to fold.
+
+    Returns:
+    - str: Lower-cased text of the same length.
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+
+    # A few characters lower-case to more than one character; those are kept as-is
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def _is_word_boundary(text, start, end):
+    """
+    Checks that a match is not glued to a word character on either side.
+
+    Parameters:
+    - text (str): Scanned text.
+    - start (int): Start offset of the match.
+    - end (int): End offset of the match.
+
+    Returns:
+    - bool: True if the match starts and ends on a word boundary.
+    """
+    if start > 0 and _WORD_CHAR.match(text, start - 1):
+        return False
+    if end < len(text) and _WORD_CHAR.match(text, end):
+        return False
+    return True
+
+
+def build_automaton(deny_lists):
+    """
+    Builds an Aho-Corasick automaton over several deny-lists at once.
+
+    Parameters:
+    - deny_lists (dict): Lists of terms, keyed by the entity type they are reported as.
+
+    Returns:
+    - dict: Automaton with its categories, goto transitions, failure links and outputs.
+    """
+    goto = [{}]
+    output = [[]]
+
+    for category, terms in enumerate(deny_lists.values()):
+        seen = set()
+        for rank, term in enumerate(terms):
+            key = _fold_case(term)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+
+            node = 0
+            for char in key:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    output.append([])
+                node = next_node
+
+            # The rank is the position in the list, which decides ties like a regex alternation would
+            output[node].append((len(key), category, rank))
+
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for char, child in goto[node].items():
+            queue.append(child)
+
+            state = fail[node]
+            while state and char not in goto[state]:
+                state = fail[state]
+            fail[child] = goto[state].get(char, 0)
+            output[child] = output[child] + output[fail[child]]
+
+    logger.info(f"built deny-list automaton with {len(goto)} states")
+    return {
+        "categories": list(deny_lists),
+        "goto": goto,
+        "fail": fail,
+        "output": output
+    }
+
+
+def find_deny_list_matches(automaton, text, categories=None):
+    """
+    Finds deny-list terms of every category in one pass over the text.
+
+    Matching is case-insensitive and only accepts whole-word hits. Within a
+    category, matches are reported like a regex alternation over the list:
+    leftmost first, the earliest-listed term on ties, and no overlaps.
+
+    Parameters:
+    - automaton (dict): Automaton built by build_automaton().
+    - text (str): Input text.
+    - categories (list): Entity types to report. Reports every category when None.
+
+    Returns:
+    - list: (start, end, entity_type) tuples ordered by start offset.
+    """
+    category_names = automaton["categories"]
+    if categories is None:
+        wanted = set(range(len(category_names)))
+    else:
+        wanted = {category_names.index(category) for category in categories if category in category_names}
+    if not wanted or not text:
+        return []
+
+    goto = automaton["goto"]
+    fail = automaton["fail"]
+    output = automaton["output"]
+
+    candidates = []
+    node = 0
+    for end, char in enumerate(_fold_case(text), 1):
+        while node and char not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(char, 0)
+
+        for length, category, rank in output[node]:
+            start = end - length
+            if category in wanted and _is_word_boundary(text, start, end):
+                candidates.append((category, start, rank, end))
+
+    candidates.sort()
+    matches = []
+    last_category = None
+    last_end = 0
+    for category, start, rank, end in candidates:
+        if category == last_category and start < last_end:
+            continue
+        matches.append((start, end, category_names[category]))
+        last_category = category
+        last_end = end
+
+    matches.sort()
+    return matches
+
+
+def find_deny_list_categories(automaton, text, categories=None, stop_at_first=False):
+    """
+    Finds which deny-list categories occur in the text, stopping the pass as soon as that is known.
+
+    A category is found exactly when find_deny_list_matches() would report a term of it:
+    any whole-word hit means the category has at least one match.
+
+    Parameters:
+    - automaton (dict): Automaton built by build_automaton().
+    - text (str): Input text.
+    - categories (list): Entity types to look for. Looks for every category when None.
+    - stop_at_first (bool): Whether to stop at the first hit of any category rather than once every category is found.
+
+    Returns:
+    - set: Entity types with at least one match.
+    """
+    category_names = automaton["categories"]
+    if categories is None:
+        wanted = set(range(len(category_names)))
+    else:
+        wanted = {category_names.index(category) for category in categories if category in category_names}
+
+    found = set()
+    if not wanted or not text:
+        return found
+
+    goto = automaton["goto"]
+    fail = automaton["fail"]
+    output = automaton["output"]
+
+    node = 0
+    for end, char in enumerate(_fold_case(text), 1):
+        while node and char not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(char, 0)
+
+        for length, category, rank in output[node]:
+            if category in wanted and category not in found and _is_word_boundary(text, end - length, end):
+                found.add(category)
+                if stop_at_first or found == wanted:
+                    return {category_names[category] for category in found}
+
+    return {category_names[category] for category in found}
+
+
+def load_deny_lists():
+    """
+    Imports the Deny_List.py vocabularies.
+
+    Returns:
+    - dict: Lists of terms, keyed by the entity type they are reported as.
+    """
+    module = importlib.import_module(DENY_LIST_MODULE)
+    return {entity_type: getattr(module, name) for entity_type, name in DENY_LIST_NAMES.items()}
+
+
+def deny_list_source_hash():
+    """
+    Hashes the content of Deny_List.py without importing it.
+
+    Returns:
+    - str: SHA-256 hex digest of the deny-list source file.
+    """
+    source_path = importlib.util.find_spec(DENY_LIST_MODULE).origin
+    with open(source_path, 'rb') as source_file:
+        return hashlib.sha256(source_file.read()).hexdigest()
+
+
+def build_artifact(artifact_path=ARTIFACT_PATH):
+    """
+    Compiles the deny-lists into a JSON automaton artifact.
+
+    The artifact is plain JSON rather than a pickle, so whoever can write to
+    PII_DENY_LIST_ARTIFACT cannot make the server run code by loading it. It
+    records its format version and the hash of Deny_List.py it was built from.
+    It is written to a temporary file first and then moved into place, so
+    concurrent workers never read a partial artifact.
+
+    Parameters:
+    - artifact_path (str): Where to write the artifact.
+
+    Returns:
+    - dict: The compiled automaton.
+    """
+    source_hash = deny_list_source_hash()
+    automaton = build_automaton(load_deny_lists())
+    artifact = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "source_hash": source_hash,
+        "automaton": automaton
+    }
+
+    artifact_dir = os.path.dirname(os.path.abspath(artifact_path))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=artifact_dir, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as artifact_file:
+            json.dump(artifact, artifact_file, separators=(",", ":"))
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, artifact_path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+    logger.info(f"wrote deny-list artifact to {artifact_path}")
+    return automaton
+
+
+def load_artifact(artifact_path=ARTIFACT_PATH):
+    """
+    Loads a deny-list artifact if it is current.
+
+    Parameters:
+    - artifact_path (str): Path of the artifact.
+
+    Returns:
+    - dict: The compiled automaton, or None when the artifact is missing, unreadable,
+      built by another format version or built from a different Deny_List.py.
+    """
+    try:
+        with open(artifact_path, encoding='utf-8') as artifact_file:
+            artifact = json.load(artifact_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read deny-list artifact {artifact_path}: {e}")
+        return None
+
+    if not isinstance(artifact, dict) or artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        logger.info("deny-list artifact format is outdated")
+        return None
+    if artifact.get("source_hash") != deny_list_source_hash():
+        logger.info("Deny_List.py changed since the deny-list artifact was built")
+        return None
+
+    return artifact["automaton"]
+
+
+def load_or_build_automaton(artifact_path=ARTIFACT_PATH):
+    """
+    Loads the deny-list artifact, rebuilding it first if it is missing or stale.
+
+    Parameters:
+    - artifact_path (str): Path of the artifact.
+
+    Returns:
+    - dict: The compiled automaton.
+    """
+    automaton = load_artifact(artifact_path)
+    if automaton is not None:
+        return automaton
+
+    try:
+        return build_artifact(artifact_path)
+    except OSError as e:
+        # A read-only install can still run, it just compiles the lists in memory
+        logger.warning(f"Could not write deny-list artifact {artifact_path}: {e}")
+        return build_automaton(load_deny_lists())
+
+
+_automaton = None
+_automaton_lock = threading.Lock()
+
+
+def get_deny_list_automaton():
+    """
+    Returns the process-wide deny-list automaton, loading it on first use.
+
+    Returns:
+    - dict: Shared deny-list automaton.
+    """
+    global _automaton
+    if _automaton is None:
+        with _automaton_lock:
+            if _automaton is None:
+                _automaton = load_or_build_automaton()
+    return _automaton
+
+
+if __name__ == "__main__":
+    build_artifact()
+    print(f"Deny-list artifact written to {ARTIFACT_PATH}")
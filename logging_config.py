@@ -0,0 +1,137 @@
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+
+LOG_FILE = os.environ.get("PII_LOG_FILE", "app.log")
+LOG_LEVEL = os.environ.get("PII_LOG_LEVEL", "INFO").upper()
+# app.log is rotated once it reaches this size, keeping LOG_BACKUP_COUNT old files, as long as
+# a single process writes it
+LOG_MAX_BYTES = int(os.environ.get("PII_LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("PII_LOG_BACKUP_COUNT", 5))
+# Records waiting to be written; when the writer falls behind further records are dropped
+LOG_QUEUE_SIZE = int(os.environ.get("PII_LOG_QUEUE_SIZE", 10000))
+LOG_FORMAT = "%(asctime)s %(levelname)s %(process)d %(name)s: %(message)s"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records instead of blocking when the queue is full,
+    so logging never holds up a request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BlockingStopQueueListener(QueueListener):
+    """
+    Queue listener whose stop signal waits for room in a full queue rather than failing.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+_queue_handler = None
+_listener = None
+# Whether other processes write the log file too, in which case nobody rotates it
+_shared = False
+_lock = threading.Lock()
+
+
+def _build_file_handler():
+    if _shared:
+        # Rotating from several processes would race, so the file is only appended to and
+        # reopened once an external tool such as logrotate has moved it
+        handler = WatchedFileHandler(LOG_FILE, encoding="utf-8", delay=True)
+    else:
+        handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def _start_listener():
+    """
+    Points the queue handler at a fresh queue and starts the thread that writes it to the log file.
+
+    Returns:
+    - QueueListener: The listener that was writing the previous queue, or None.
+    """
+    global _listener
+    previous = _listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _queue_handler.queue = log_queue
+    _listener = BlockingStopQueueListener(log_queue, _build_file_handler(), respect_handler_level=True)
+    _listener.start()
+    return previous
+
+
+def _share_after_fork_in_parent():
+    # The child now writes the log file too, so the parent stops rotating it
+    global _shared
+    if _queue_handler is not None and not _shared:
+        _shared = True
+        previous = _start_listener()
+        if previous is not None:
+            previous.stop()
+
+
+def _restart_after_fork():
+    # A forked worker inherits the queue but not the writer thread, so it gets its own,
+    # appending to the log file it shares with the parent
+    global _shared
+    if _queue_handler is not None:
+        _shared = True
+        _start_listener()
+
+
+def stop_logging():
+    """
+    Writes out the queued records and stops the background writer.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging():
+    """
+    Sends log records through a queue to a background thread that writes them to a rotating log file.
+
+    Once the process forks, or when it is itself a worker of another process, several
+    processes write the log file; it is then only appended to and rotation is left to
+    an external tool.
+
+    Like logging.basicConfig(), this does nothing if the root logger already has
+    handlers, so an application can configure logging its own way.
+
+    Returns:
+    - DroppingQueueHandler: The handler attached to the root logger, or None if logging was already configured.
+    """
+    global _queue_handler, _shared
+    with _lock:
+        root = logging.getLogger()
+        if root.handlers:
+            return None
+
+        _shared = multiprocessing.parent_process() is not None
+        _queue_handler = DroppingQueueHandler(None)
+        _start_listener()
+        root.addHandler(_queue_handler)
+        root.setLevel(LOG_LEVEL)
+
+        atexit.register(stop_logging)
+        os.register_at_fork(after_in_parent=_share_after_fork_in_parent, after_in_child=_restart_after_fork)
+        return _queue_handler
@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds of the stage duration histogram buckets
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stages reported in a timings block; recognizer durations are kept per recognizer
+TIMING_STAGES = ["extraction", "recognizers", "encoding", "total"]
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Histogram:
+    """
+    Thread-safe histogram rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self, name, documentation, label_names, buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = list(label_names)
+        self.buckets = sorted(buckets) + [float("inf")]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """
+        Records one observation.
+
+        Parameters:
+        - value (float): Observed value.
+        - label_values (str): Value of each label, in the order of label_names.
+        """
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        """
+        Renders the histogram in the Prometheus text exposition format.
+
+        Returns:
+        - list: Exposition lines.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram"
+        ]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                labels = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(self.label_names, label_values)]
+
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    bucket_labels = ",".join(labels + [f'le="{_format_bound(bound)}"'])
+                    lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+
+                label_text = "{" + ",".join(labels) + "}" if labels else ""
+                lines.append(f"{self.name}_sum{label_text} {series['sum']!r}")
+                lines.append(f"{self.name}_count{label_text} {series['count']}")
+
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "pii_stage_duration_seconds",
+    "Time an extraction request spent in each stage, in seconds.",
+    ["stage", "recognizer"]
+)
+
+_active_timings = ContextVar("active_timings", default=None)
+
+
+def new_timings():
+    """
+    Creates an empty timings block.
+
+    Returns:
+    - dict: Seconds per stage, with recognizer durations keyed by recognizer.
+    """
+    return {"extraction": 0.0, "recognizers": {}, "encoding": 0.0, "total": 0.0}
+
+
+def add_timing(timings, stage, seconds, recognizer=None):
+    """
+    Adds a duration to a timings block.
+
+    Parameters:
+    - timings (dict): Timings block built by new_timings().
+    - stage (str): One of TIMING_STAGES.
+    - seconds (float): Duration to add.
+    - recognizer (str): Recognizer name, for the "recognizers" stage.
+    """
+    if stage == "recognizers":
+        timings["recognizers"][recognizer] = timings["recognizers"].get(recognizer, 0.0) + seconds
+    else:
+        timings[stage] += seconds
+
+
+def merge_timings(other):
+    """
+    Adds a timings block collected elsewhere, such as in a worker process, to the active one.
+
+    Parameters:
+    - other (dict): Timings block to add.
+    """
+    timings = _active_timings.get()
+    if timings is None or not other:
+        return
+
+    for stage in TIMING_STAGES:
+        if stage == "recognizers":
+            for recognizer, seconds in other["recognizers"].items():
+                add_timing(timings, stage, seconds, recognizer)
+        elif stage != "total":
+            add_timing(timings, stage, other[stage])
+
+
+@contextmanager
+def collect_timings():
+    """
+    Collects the stage durations recorded in this context.
+
+    Yields:
+    - dict: Timings block that fills up as stages are recorded.
+    """
+    timings = new_timings()
+    token = _active_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _active_timings.reset(token)
+
+
+@contextmanager
+def record_stage(stage, recognizer=None):
+    """
+    Times a stage and adds it to the timings being collected. Does nothing outside collect_timings().
+
+    Parameters:
+    - stage (str): One of TIMING_STAGES.
+    - recognizer (str): Recognizer name, for the "recognizers" stage.
+    """
+    timings = _active_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(timings, stage, time.perf_counter() - start, recognizer)
+
+
+def timed_call(function, *args, **kwargs):
+    """
+    Calls a function while collecting the durations of the stages it records.
+
+    Parameters:
+    - function (callable): Function to call, such as main() or main_batch().
+    - args, kwargs: Arguments passed to the function.
+
+    Returns:
+    - tuple: The function's return value and its timings block.
+    """
+    with collect_timings() as timings:
+        with record_stage("total"):
+            result = function(*args, **kwargs)
+    return result, timings
+
+
+def observe_timings(timings):
+    """
+    Records a request's timings block in the stage duration histogram.
+
+    Parameters:
+    - timings (dict): Timings block of one request.
+    """
+    for stage in TIMING_STAGES:
+        if stage == "recognizers":
+            for recognizer, seconds in timings["recognizers"].items():
+                STAGE_SECONDS.observe(seconds, "recognizer", recognizer)
+        else:
+            STAGE_SECONDS.observe(timings[stage], stage, "")
+
+
+def render_metrics():
+    """
+    Renders every metric in the Prometheus text exposition format.
+
+    Returns:
+    - str: Exposition text.
+    """
+    return "\n".join(STAGE_SECONDS.render()) + "\n"
@@ -0,0 +1,152 @@
+import os
+import re
+
+# Flags presidio applies to pattern recognizers, kept so every pattern matches as before
+PATTERN_FLAGS = re.DOTALL | re.MULTILINE | re.IGNORECASE
+
+# Entity patterns as (entity type, regex, score), most specific first. The order is the
+# overlap policy of the fused scan: when several patterns match at the same position the
+# earliest one wins and its whole span is consumed, so a tax ID or date of birth inside an
+# AAA number is reported only as the AAA number, and a 10-digit phone number only as a phone number.
+PATTERN_DEFINITIONS = [
+    ("EMAIL", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", 1.0),
+    ("AAA Number", r"\d{2}-\d{2}-\d{4}-\d{4}", 0.9),
+    ("FINANCIAL_ACCOUNT_NUMBER", r"\b\d{4}\s?\d{4}\s?\d{4}\s?\d{4}\b", 0.9),
+    ("PATIENT_ID_NUMBER", r"\b[A-Z]{3}-\d{5}-[A-Z0-9]{2}\b", 0.85),
+    ("DRIVER_LICENSE_NUMBER", r"\b[A-Z0-9]{3}-[A-Z0-9]{6}-[A-Z0-9]{3}\b", 0.85),
+    ("TAX_ID", r"\b\d{3}-\d{2}-\d{4}\b", 0.9),
+    ("DATE_OF_BIRTH", r"\b(?:\d{4}-\d{2}-\d{2}|\d{2}-\d{2}-\d{4}|\d{2}-\d{2}-\d{2}|\d{2}-\d{2}-\d{2}|\d{2}-\d{2}-\d{2})\b", 0.85),
+    ("PHONE_NUMBER", r"(\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}", 0.8),
+    ("LOCATION", r"\b(?:\d+\s[A-Za-z]+\s(?:Street|Avenue|Road)|[A-Za-z]+\s(?:Street|Avenue|Road)|[A-Za-z]+\s(?:Area|Town|Village|City|State)|[A-Za-z]+\s(?:Country))\b", 0.85),
+    ("BIOMETRIC_IDENTIFIER", r"\b[A-Z0-9]{10}\b", 0.85)
+]
+
+PATTERN_ENTITY_TYPES = [entity_type for entity_type, _, _ in PATTERN_DEFINITIONS]
+
+# "priority" scans once with the fused pattern; "independent" scans each pattern on its own,
+# so overlapping matches of different entities are all reported
+PATTERN_OVERLAP_POLICY = os.environ.get("PII_PATTERN_OVERLAP_POLICY", "priority")
+
+
+def _group_name(entity_type):
+    return re.sub(r"\W", "_", entity_type)
+
+
+def _build_fused_pattern():
+    """
+    Combines every entity pattern into one regex with a named group per entity.
+
+    Returns:
+    - tuple: Compiled fused regex and a mapping of group name to (entity type, score).
+    """
+    alternatives = []
+    groups = {}
+    for entity_type, regex, score in PATTERN_DEFINITIONS:
+        group = _group_name(entity_type)
+        alternatives.append(f"(?P<{group}>{regex})")
+        groups[group] = (entity_type, score)
+
+    return re.compile("|".join(alternatives), PATTERN_FLAGS), groups
+
+
+FUSED_PATTERN, FUSED_GROUPS = _build_fused_pattern()
+
+ENTITY_PATTERNS = {
+    entity_type: (re.compile(regex, PATTERN_FLAGS), score)
+    for entity_type, regex, score in PATTERN_DEFINITIONS
+}
+
+
+def scan_patterns(text, entity_types=None, overlap_policy=None):
+    """
+    Finds pattern-based entities in the text.
+
+    With the "priority" policy the text is walked once by the fused pattern and
+    each match is routed to its entity type; overlaps are settled by the order
+    of PATTERN_DEFINITIONS. The result for an entity therefore does not depend
+    on which other entities are requested.
+
+    Parameters:
+    - text (str): Input text.
+    - entity_types (list): Entity types to report. Reports every pattern entity when None.
+    - overlap_policy (str): "priority" or "independent". Defaults to PATTERN_OVERLAP_POLICY.
+
+    Returns:
+    - list: (start, end, entity_type, score) tuples ordered by start offset.
+    """
+    wanted = set(PATTERN_ENTITY_TYPES if entity_types is None else entity_types)
+    overlap_policy = overlap_policy or PATTERN_OVERLAP_POLICY
+
+    matches = []
+    if overlap_policy == "priority":
+        for match in FUSED_PATTERN.finditer(text):
+            entity_type, score = FUSED_GROUPS[match.lastgroup]
+            if entity_type in wanted and match.end() > match.start():
+                matches.append((match.start(), match.end(), entity_type, score))
+
+    elif overlap_policy == "independent":
+        for entity_type in PATTERN_ENTITY_TYPES:
+            if entity_type not in wanted:
+                continue
+            pattern, score = ENTITY_PATTERNS[entity_type]
+            for match in pattern.finditer(text):
+                if match.end() > match.start():
+                    matches.append((match.start(), match.end(), entity_type, score))
+        matches.sort()
+
+    else:
+        raise ValueError(f"Unknown pattern overlap policy: {overlap_policy}")
+
+    return matches
+
+
+def find_pattern_entity_types(text, entity_types=None, stop_at_first=False, overlap_policy=None):
+    """
+    Finds which pattern-based entity types occur in the text, stopping the scan as soon as that is known.
+
+    A type is found exactly when scan_patterns() would report a match of it.
+
+    Parameters:
+    - text (str): Input text.
+    - entity_types (list): Entity types to look for. Looks for every pattern entity when None.
+    - stop_at_first (bool): Whether to stop at the first match of any type rather than once every type is found.
+    - overlap_policy (str): "priority" or "independent". Defaults to PATTERN_OVERLAP_POLICY.
+
+    Returns:
+    - set: Entity types with at least one match.
+    """
+    wanted = set(PATTERN_ENTITY_TYPES if entity_types is None else entity_types)
+    overlap_policy = overlap_policy or PATTERN_OVERLAP_POLICY
+
+    found = set()
+    if not wanted:
+        return found
+
+    if overlap_policy == "priority":
+        # The fused scan can only report a type whose own pattern matches, and a single
+        # pattern is much cheaper to search than the fused one, so clean texts end here
+        wanted = {entity_type for entity_type in wanted if ENTITY_PATTERNS[entity_type][0].search(text)}
+        if not wanted:
+            return found
+
+        for match in FUSED_PATTERN.finditer(text):
+            entity_type, _ = FUSED_GROUPS[match.lastgroup]
+            if entity_type in wanted and match.end() > match.start():
+                found.add(entity_type)
+                if stop_at_first or found == wanted:
+                    break
+
+    elif overlap_policy == "independent":
+        for entity_type in PATTERN_ENTITY_TYPES:
+            if entity_type not in wanted:
+                continue
+            pattern, _ = ENTITY_PATTERNS[entity_type]
+            if any(match.end() > match.start() for match in pattern.finditer(text)):
+                found.add(entity_type)
+                if stop_at_first:
+                    break
+
+    else:
+        raise ValueError(f"Unknown pattern overlap policy: {overlap_policy}")
+
+    return found
@@ -1,60 +1,124 @@
-from presidio_analyzer import PatternRecognizer, AnalyzerEngine, Pattern
-from presidio_anonymizer import AnonymizerEngine
-from docx import Document
-import datefinder
-import spacy
-import fitz
 import re
+import codecs
+import importlib
+import io
+import json
 import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from builtins import PendingDeprecationWarning
 
-from Deny_List import (
-    citizenship_immigration_terms, female_names, criminal_history_deny_list,
-    genders, religious_affiliations, identity_terms, medical_history_deny_list, title_denylist
-)
+from logging_config import configure_logging
+from date_engine import DATE_FORMATS, contains_date, find_dates, format_date
+from deny_list_matcher import ARTIFACT_FORMAT_VERSION, deny_list_source_hash, find_deny_list_categories, get_deny_list_automaton
+from pattern_scanner import PATTERN_DEFINITIONS, PATTERN_ENTITY_TYPES, PATTERN_OVERLAP_POLICY, find_pattern_entity_types, scan_patterns
+from metrics import collect_timings, merge_timings, record_stage
+from result_cache import build_cache_key, get_result_cache, hash_buffer, hash_file, hash_text
  
 # Setting up logging configuration
-logging.basicConfig(filename='app.log', level=logging.DEBUG)
+configure_logging()
+
+# presidio, spaCy, PyMuPDF, python-docx and datefinder are imported by the functions
+# that use them, so callers that never need them do not pay for loading them
  
 #Extracting from pdf
-def extract_text_from_pdf(pdf_path):
+def open_pdf(pdf_path):
     """
-    Extracts text content from a PDF file.
+    Opens a PDF document from a file or from memory.
+
+    Parameters:
+    - pdf_path: Path to the PDF file, or its content as bytes or a binary file object.
+
+    Returns:
+    - fitz.Document: Open document.
+    """
+    import fitz
+
+    if isinstance(pdf_path, str):
+        return fitz.open(pdf_path)
+    if hasattr(pdf_path, "read"):
+        pdf_path = pdf_path.read()
+    return fitz.open(stream=pdf_path, filetype="pdf")
+
+def iter_pdf_pages(pdf_path, first_page=1, last_page=None):
+    """
+    Yields the text of a PDF file one page at a time, so only the current page is held in memory.
  
     Parameters:
-    - pdf_path (str): Path to the PDF file.
+    - pdf_path: Path to the PDF file, or its content as bytes or a binary file object.
+    - first_page (int): First page to extract, starting at 1.
+    - last_page (int): Last page to extract, inclusive. Extracts up to the end of the document when None.
  
-    Returns:
-    - str: Extracted text from the PDF.
+    Yields:
+    - tuple: Page number (starting at 1) and the text of that page.
     """
-    text = ""
     try:
         logging.info("extracting text from pdf file")
-        with fitz.open(pdf_path) as pdf_document:
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                text += page.get_text()
+        with open_pdf(pdf_path) as pdf_document:
+            last_page = pdf_document.page_count if last_page is None else min(last_page, pdf_document.page_count)
+            for page_num in range(first_page - 1, last_page):
+                yield page_num + 1, pdf_document[page_num].get_text()
             logging.info("text extracted from pdf successfully")
     except Exception as e:
         logging.error(f"Error extracting text from PDF: {e}")
         raise  # Raising an exception for better traceability
  
-    logging.info(text)
+def extract_text_from_pdf(pdf_path):
+    """
+    Extracts text content from a PDF file.
+ 
+    Parameters:
+    - pdf_path: Path to the PDF file, or its content as bytes or a binary file object.
+ 
+    Returns:
+    - str: Extracted text from the PDF.
+    """
+    text = "".join(page_text for _, page_text in iter_pdf_pages(pdf_path))
+ 
+    logging.info(f"extracted {len(text)} characters from pdf file")
     return text
 pass
  
 #Extracting from text file
+# Bytes decoded at a time when reading text from a binary file object
+TEXT_DECODE_CHUNK_SIZE = 1024 * 1024
+
+def decode_text_stream(stream, encoding='utf-8'):
+    """
+    Decodes a binary file object chunk by chunk, so the encoded and decoded text are never both held whole.
+
+    Parameters:
+    - stream: Binary file object.
+    - encoding (str): Text encoding.
+
+    Returns:
+    - str: Decoded text.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = [decoder.decode(chunk) for chunk in iter(lambda: stream.read(TEXT_DECODE_CHUNK_SIZE), b"")]
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
 def extract_text_from_text_file(text_file_path):
     """
     Extracts text content from a text file.
  
     Parameters:
-    - text_file_path (str): Path to the text file.
+    - text_file_path: Path to the text file, or its content as bytes or a binary file object.
  
     Returns:
     - str: Extracted text from the text file.
     """
     try:
+        if hasattr(text_file_path, "read"):
+            return decode_text_stream(text_file_path)
+        if not isinstance(text_file_path, str):
+            return str(text_file_path, 'utf-8')
  
         with open(text_file_path, 'r', encoding='utf-8') as text_file:
             text = text_file.read()
@@ -72,12 +136,16 @@ def extract_text_from_document(docx_file_path):
     Extracts text content from a Word document.
  
     Parameters:
-    - docx_file_path (str): Path to the Word document.
+    - docx_file_path: Path to the Word document, or its content as bytes or a binary file object.
  
     Returns:
     - str: Extracted text from the Word document.
     """
     try:
+        from docx import Document
+
+        if not isinstance(docx_file_path, str) and not hasattr(docx_file_path, "read"):
+            docx_file_path = io.BytesIO(docx_file_path)
         document = Document(docx_file_path)
         text = ""
         for paragraph in document.paragraphs:
@@ -88,8 +156,142 @@ def extract_text_from_document(docx_file_path):
  
     return ""
     pass
+
+
+def log_recognition_summary(recognizer_name, output_dict, text):
+    """
+    Logs how many values a recognizer found. Neither the text nor the values are logged.
  
- 
+    Parameters:
+    - recognizer_name (str): Name of the recognizer function.
+    - output_dict (dict): Output dictionary of the recognizer.
+    - text (str): Analyzed text.
+    """
+    logging.info("%s recognized %d values in %d characters", recognizer_name, len(output_dict['recognized_values']), len(text))
+
+def log_extraction_summary(function_name, results, input_size, elapsed, cached=0):
+    """
+    Logs the number of values found per entity, the input size and the duration of an extraction.
+    Neither the input nor the values are logged.
+
+    Parameters:
+    - function_name (str): Name of the extraction function.
+    - results (list): Output of main() for each analyzed input.
+    - input_size (str): Description of the input size, such as "120 characters".
+    - elapsed (float): Duration in seconds.
+    - cached (int): Number of inputs answered from the result cache.
+    """
+    # Counting the values costs a pass over every result, so it is skipped when INFO is not logged
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
+
+    counts = {}
+    for result in results:
+        if "detected" in result:
+            for entity, detected in result["entities"].items():
+                counts[entity] = counts.get(entity, 0) + (detected is True)
+            continue
+        if "spans" in result:
+            for span in result["spans"]:
+                counts[span["entity"]] = counts.get(span["entity"], 0) + 1
+            continue
+        for entity, output in result.items():
+            counts[entity] = counts.get(entity, 0) + len(output["recognized_values"])
+
+    logging.info("%s analyzed %d inputs (%s, %d cached) in %.3fs, values per entity: %s", function_name, len(results), input_size, cached, elapsed, counts)
+
+#Shared analyzer registry
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def build_recognizers():
+    """
+    Builds every custom recognizer used by the entity recognizers.
+
+    Returns:
+    - list: Recognizer instances to register with the analyzer engine.
+    """
+    from custom_recognizers import DenyListRecognizer, FusedPatternRecognizer
+
+    return [
+        DenyListRecognizer(get_deny_list_automaton()),
+        FusedPatternRecognizer()
+    ]
+
+def instrument_recognizer(recognizer):
+    """
+    Times every analyze() call of a registered recognizer as a stage named after the recognizer.
+
+    Parameters:
+    - recognizer (EntityRecognizer): Recognizer registered with the analyzer engine.
+    """
+    analyze = recognizer.analyze
+
+    def timed_analyze(*args, **kwargs):
+        with record_stage("recognizers", recognizer.name):
+            return analyze(*args, **kwargs)
+
+    recognizer.analyze = timed_analyze
+
+def get_analyzer():
+    """
+    Returns the process-wide analyzer engine, building it on first use.
+
+    The engine and its NLP model are loaded once and every custom recognizer is
+    registered up front, so each recognizer call only pays for the analysis itself.
+
+    Returns:
+    - AnalyzerEngine: Shared analyzer engine.
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                from presidio_analyzer import AnalyzerEngine
+
+                logging.info("building shared analyzer engine")
+                analyzer = AnalyzerEngine()
+                for recognizer in build_recognizers():
+                    analyzer.registry.add_recognizer(recognizer)
+                for recognizer in analyzer.registry.recognizers:
+                    instrument_recognizer(recognizer)
+                _analyzer = analyzer
+    return _analyzer
+
+
+#Shared spaCy pipeline for organization detection
+SPACY_MODEL = "en_core_web_sm"
+# ORG detection only needs the tokenizer, tok2vec and ner components
+SPACY_EXCLUDED_COMPONENTS = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+SPACY_MAX_LENGTH = int(os.environ.get("PII_SPACY_MAX_LENGTH", 1000000))
+SPACY_BATCH_SIZE = int(os.environ.get("PII_SPACY_BATCH_SIZE", 32))
+
+_spacy_nlp = None
+_spacy_nlp_lock = threading.Lock()
+
+def get_spacy_nlp():
+    """
+    Returns the process-wide spaCy pipeline, loading it on first use.
+
+    Components that ORG detection does not need are excluded, and the maximum
+    text length comes from PII_SPACY_MAX_LENGTH.
+
+    Returns:
+    - Language: Shared spaCy pipeline.
+    """
+    global _spacy_nlp
+    if _spacy_nlp is None:
+        with _spacy_nlp_lock:
+            if _spacy_nlp is None:
+                import spacy
+
+                logging.info(f"loading spaCy model {SPACY_MODEL}")
+                nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDED_COMPONENTS)
+                nlp.max_length = SPACY_MAX_LENGTH
+                _spacy_nlp = nlp
+    return _spacy_nlp
+
+
 #Entity Recognizers
 def citizenship_recognizer(text):
     """
@@ -105,18 +307,12 @@ def citizenship_recognizer(text):
     try:
         logging.info("checking for citizenship")
        
-        citizenship_recognizer = PatternRecognizer(
-            supported_entity="CITIZENSHIP",
-            deny_list=citizenship_immigration_terms
-        )
- 
         citizen_output_dict = {
             "entity_type": [],
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(citizenship_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["CITIZENSHIP"])
  
@@ -126,9 +322,7 @@ def citizenship_recognizer(text):
             citizen_output_dict["entity_type"].append(entity_name)
             citizen_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(citizen_output_dict["entity_type"], citizen_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("citizenship_recognizer", citizen_output_dict, text)
  
         return citizen_output_dict
  
@@ -139,21 +333,14 @@ def citizenship_recognizer(text):
         return {"error": str(e)}
  
 def person_recognizer(text):
-    logging.info(text)
     try:
         logging.info("Checking for person name")
-        person_recognizer = PatternRecognizer(
-            supported_entity="PERSON",
-            deny_list=female_names
-        )
- 
         person_output_dict = {
             "entity_type": "PERSON",
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(person_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["PERSON"])
  
@@ -162,8 +349,7 @@ def person_recognizer(text):
             redacted_value = text[result.start:result.end]
             person_output_dict["recognized_values"].append(redacted_value)
  
-        for value in person_output_dict["recognized_values"]:
-            logging.info(f"Recognized Value: {value}")
+        log_recognition_summary("person_recognizer", person_output_dict, text)
  
         return person_output_dict
  
@@ -181,18 +367,12 @@ def criminal_history_recognizer(text):
     Returns:
     - dict: Dictionary containing recognized Criminal History.
     """
-    criminal_history_recognizer = PatternRecognizer(
-        supported_entity="CRIMINAL HISTORY",
-        deny_list=criminal_history_deny_list
-    )
- 
     criminal_history_output_dict = {
         "entity_type": [],
         "recognized_values": []
     }
  
-    analyzer = AnalyzerEngine()
-    analyzer.registry.add_recognizer(criminal_history_recognizer)
+    analyzer = get_analyzer()
  
     results = analyzer.analyze(text, language='en', entities=["CRIMINAL HISTORY"])
  
@@ -202,9 +382,7 @@ def criminal_history_recognizer(text):
         criminal_history_output_dict["entity_type"].append(entity_name)
         criminal_history_output_dict["recognized_values"].append(redacted_value)
  
-    for entity, value in zip(criminal_history_output_dict["entity_type"], criminal_history_output_dict["recognized_values"]):
-        logging.info(f"Entity Type: {entity}")
-        logging.info(f"Recognized Value: {value}\n")
+    log_recognition_summary("criminal_history_recognizer", criminal_history_output_dict, text)
  
     return criminal_history_output_dict
     pass
@@ -221,21 +399,18 @@ def email_recognizer(text):
     """
     try:
         logging.info("Checking for email")
-        email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
-       
         email_output_dict = {
             "entity_type": "EMAIL",
             "recognized_values": []
         }
  
-        matches = email_pattern.finditer(text)
+        matches = scan_patterns(text, ["EMAIL"])
        
-        for match in matches:
-            redacted_value = match.group(0)
+        for start, end, entity_type, score in matches:
+            redacted_value = text[start:end]
             email_output_dict["recognized_values"].append(redacted_value)
  
-        for value in email_output_dict["recognized_values"]:
-            logging.info(f"Recognized Value: {value}")
+        log_recognition_summary("email_recognizer", email_output_dict, text)
  
         return email_output_dict
  
@@ -255,18 +430,12 @@ def religious_affiliations_recognizer(text):
     """
     try:
         logging.info("Checking for religious affiliations")
-        religious_affiliations_recognizer = PatternRecognizer(
-            supported_entity="RELIGIOUS AFFILIATION",
-            deny_list=religious_affiliations
-        )
- 
         religious_affiliations_output_dict = {
             "entity_type": "RELIGIOUS AFFILIATION",
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(religious_affiliations_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["RELIGIOUS AFFILIATION"])
  
@@ -275,8 +444,7 @@ def religious_affiliations_recognizer(text):
             redacted_value = text[result.start:result.end]
             religious_affiliations_output_dict["recognized_values"].append(redacted_value)
  
-        for value in religious_affiliations_output_dict["recognized_values"]:
-            logging.info(f"Recognized Value: {value}")
+        log_recognition_summary("religious_affiliations_recognizer", religious_affiliations_output_dict, text)
  
         return religious_affiliations_output_dict
  
@@ -295,18 +463,12 @@ def sexual_orientation_recognizer(text):
     - dict: Dictionary containing recognized Sexual Orientation.
     """
     try:
-        sexual_orientation_recognizer = PatternRecognizer(
-            supported_entity="SEXUAL ORIENTATION",
-            deny_list=identity_terms
-        )
- 
         sexual_orientation_output_dict = {
             "entity_type": [],
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(sexual_orientation_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["SEXUAL ORIENTATION"])
  
@@ -316,9 +478,7 @@ def sexual_orientation_recognizer(text):
             sexual_orientation_output_dict["entity_type"].append(entity_name)
             sexual_orientation_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(sexual_orientation_output_dict["entity_type"], sexual_orientation_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("sexual_orientation_recognizer", sexual_orientation_output_dict, text)
  
         return sexual_orientation_output_dict
  
@@ -337,15 +497,8 @@ def driver_license_recognizer(text):
     - dict: Dictionary containing recognized Driver License.
     """
     try:
-        # Define the driver's license pattern
-        driver_license_pattern = Pattern(name="driver_license_pattern", regex=r"\b[A-Z0-9]{3}-[A-Z0-9]{6}-[A-Z0-9]{3}\b", score=0.85)
- 
-        # Create a recognizer for driver's license using the defined pattern
-        driver_license_recognizer = PatternRecognizer(supported_entity="DRIVER_LICENSE_NUMBER", patterns=[driver_license_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(driver_license_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for driver's license entities
         results = analyzer.analyze(text, language='en', entities=["DRIVER_LICENSE_NUMBER"])
@@ -361,8 +514,7 @@ def driver_license_recognizer(text):
             redacted_value = text[result.start:result.end]
             driver_license_output_dict["recognized_values"].append(redacted_value)
  
-        for value in driver_license_output_dict["recognized_values"]:
-            logging.info(f"Recognized Value: {value}")
+        log_recognition_summary("driver_license_recognizer", driver_license_output_dict, text)
  
         return driver_license_output_dict
  
@@ -381,15 +533,8 @@ def financial_account_recognizer(text):
     - dict: Dictionary containing recognized Financial Account Number.
     """
     try:
-        # Define the financial account pattern
-        financial_account_pattern = Pattern(name="financial_account_pattern", regex=r"\b\d{4}\s?\d{4}\s?\d{4}\s?\d{4}\b", score=0.9)
- 
-        # Create a recognizer for financial account using the defined pattern
-        financial_account_recognizer = PatternRecognizer(supported_entity="FINANCIAL_ACCOUNT_NUMBER", patterns=[financial_account_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(financial_account_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for financial account entities
         results = analyzer.analyze(text, language='en', entities=["FINANCIAL_ACCOUNT_NUMBER"])
@@ -406,9 +551,7 @@ def financial_account_recognizer(text):
             financial_account_output_dict["entity_type"].append(entity_name)
             financial_account_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(financial_account_output_dict["entity_type"], financial_account_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("financial_account_recognizer", financial_account_output_dict, text)
  
         return financial_account_output_dict
  
@@ -427,15 +570,8 @@ def phone_number_recognizer(text):
     - dict: Dictionary containing recognized Phone Number.
     """
     try:
-        # Define the phone number pattern
-        phone_number_pattern = Pattern(name="phone_number_pattern", regex=r"(\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}", score=0.8)
- 
-        # Create a recognizer for phone number using the defined pattern
-        phone_number_recognizer = PatternRecognizer(supported_entity="PHONE_NUMBER", patterns=[phone_number_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(phone_number_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for phone number entities
         results = analyzer.analyze(text, language='en', entities=["PHONE_NUMBER"])
@@ -452,9 +588,7 @@ def phone_number_recognizer(text):
             phone_number_output_dict["entity_type"].append(entity_name)
             phone_number_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(phone_number_output_dict["entity_type"], phone_number_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("phone_number_recognizer", phone_number_output_dict, text)
  
         return phone_number_output_dict
  
@@ -473,15 +607,8 @@ def biometric_identifier_recognizer(text):
     - dict: Dictionary containing recognized Biometric Identifier.
     """
     try:
-        # Define the biometric identifier pattern
-        biometric_identifier_pattern = Pattern(name="biometric_identifier_pattern", regex=r"\b[A-Z0-9]{10}\b", score=0.85)
- 
-        # Create a recognizer for biometric identifier using the defined pattern
-        biometric_identifier_recognizer = PatternRecognizer(supported_entity="BIOMETRIC_IDENTIFIER", patterns=[biometric_identifier_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(biometric_identifier_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for biometric identifier entities
         results = analyzer.analyze(text, language='en', entities=["BIOMETRIC_IDENTIFIER"])
@@ -498,9 +625,7 @@ def biometric_identifier_recognizer(text):
             biometric_identifier_output_dict["entity_type"].append(entity_name)
             biometric_identifier_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(biometric_identifier_output_dict["entity_type"], biometric_identifier_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("biometric_identifier_recognizer", biometric_identifier_output_dict, text)
  
         return biometric_identifier_output_dict
  
@@ -519,15 +644,8 @@ def patient_id_recognizer(text):
     - dict: Dictionary containing recognized Patient ID Number.
     """
     try:
-        # Define the patient ID pattern
-        patient_id_pattern = Pattern(name="patient_id_pattern", regex=r"\b[A-Z]{3}-\d{5}-[A-Z0-9]{2}\b", score=0.85)
- 
-        # Create a recognizer for patient ID using the defined pattern
-        patient_id_recognizer = PatternRecognizer(supported_entity="PATIENT_ID_NUMBER", patterns=[patient_id_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(patient_id_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for patient ID entities
         results = analyzer.analyze(text, language='en', entities=["PATIENT_ID_NUMBER"])
@@ -544,9 +662,7 @@ def patient_id_recognizer(text):
             patient_id_output_dict["entity_type"].append(entity_name)
             patient_id_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(patient_id_output_dict["entity_type"], patient_id_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("patient_id_recognizer", patient_id_output_dict, text)
  
         return patient_id_output_dict
  
@@ -565,19 +681,8 @@ def dob_recognizer(text):
     - dict: Dictionary containing recognized Date of Birth.
     """
     try:
-        # Define the date of birth pattern with multiple formats
-        dob_pattern = Pattern(
-            name="dob_pattern",
-            regex=r"\b(?:\d{4}-\d{2}-\d{2}|\d{2}-\d{2}-\d{4}|\d{2}-\d{2}-\d{2}|\d{2}-\d{2}-\d{2}|\d{2}-\d{2}-\d{2})\b",
-            score=0.85
-        )
- 
-        # Create a recognizer for date of birth using the defined pattern
-        dob_recognizer = PatternRecognizer(supported_entity="DATE_OF_BIRTH", patterns=[dob_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(dob_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for date of birth entities
         results = analyzer.analyze(text, language='en', entities=["DATE_OF_BIRTH"])
@@ -594,9 +699,7 @@ def dob_recognizer(text):
             dob_output_dict["entity_type"].append(entity_name)
             dob_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(dob_output_dict["entity_type"], dob_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("dob_recognizer", dob_output_dict, text)
  
         return dob_output_dict
  
@@ -615,18 +718,12 @@ def medical_history_recognizer(text):
     - dict: Dictionary containing recognized Medical History.
     """
     try:
-        medical_history_recognizer = PatternRecognizer(
-            supported_entity="MEDICAL HISTORY",
-            deny_list=medical_history_deny_list
-        )
- 
         medical_history_output_dict = {
             "entity_type": [],
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(medical_history_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["MEDICAL HISTORY"])
  
@@ -636,9 +733,7 @@ def medical_history_recognizer(text):
             medical_history_output_dict["entity_type"].append(entity_name)
             medical_history_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(medical_history_output_dict["entity_type"], medical_history_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("medical_history_recognizer", medical_history_output_dict, text)
  
         return medical_history_output_dict
  
@@ -657,18 +752,12 @@ def genders_recognizer(text):
     - dict: Dictionary containing recognized Genders.
     """
     try:
-        genders_recognizer = PatternRecognizer(
-            supported_entity="GENDER",
-            deny_list=genders
-        )
- 
         genders_output_dict = {
             "entity_type": [],
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(genders_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["GENDER"])
  
@@ -678,9 +767,7 @@ def genders_recognizer(text):
             genders_output_dict["entity_type"].append(entity_name)
             genders_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(genders_output_dict["entity_type"], genders_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("genders_recognizer", genders_output_dict, text)
  
         return genders_output_dict
  
@@ -699,31 +786,20 @@ def title_recognizer(text):
     - dict: Dictionary containing recognized Title.
     """
     try:
-        title_recognizer = PatternRecognizer(
-            supported_entity="TITLE",
-            deny_list=title_denylist
-        )
- 
         title_output_dict = {
-            "entity_type": [],
+            "entity_type": "TITLE",
             "recognized_values": []
         }
  
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(title_recognizer)
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["TITLE"])
  
         for result in results:
-            entity_name = result.entity_type
             redacted_value = text[result.start:result.end]
-          #  title_output_dict["entity_type"].append(entity_name)
             title_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(title_output_dict["entity_type"], title_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
-        title_output_dict["entity_type"] = entity_name
+        log_recognition_summary("title_recognizer", title_output_dict, text)
         return title_output_dict
  
     except Exception as e:
@@ -741,15 +817,8 @@ def tax_id_recognizer(text):
     - dict: Dictionary containing recognized Tax ID Number.
     """
     try:
-        # Define the tax ID pattern
-        tax_id_pattern = Pattern(name="tax_id_pattern", regex=r"\b\d{3}-\d{2}-\d{4}\b", score=0.9)
- 
-        # Create a recognizer for tax ID using the defined pattern
-        tax_id_recognizer = PatternRecognizer(supported_entity="TAX_ID", patterns=[tax_id_pattern])
- 
-        # Initialize the analyzer engine and add the recognizer to the registry
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(tax_id_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         # Analyze the text for tax ID entities
         results = analyzer.analyze(text, language='en', entities=["TAX_ID"])
@@ -766,9 +835,7 @@ def tax_id_recognizer(text):
             tax_id_output_dict["entity_type"].append(entity_name)
             tax_id_output_dict["recognized_values"].append(redacted_value)
  
-        for entity, value in zip(tax_id_output_dict["entity_type"], tax_id_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("tax_id_recognizer", tax_id_output_dict, text)
  
         return tax_id_output_dict
  
@@ -794,16 +861,8 @@ def location_recognizer(text):
             "recognized_values": []
         }
  
-        location_pattern = Pattern(
-            name="location_pattern",
-            regex=r"\b(?:\d+\s[A-Za-z]+\s(?:Street|Avenue|Road)|[A-Za-z]+\s(?:Street|Avenue|Road)|[A-Za-z]+\s(?:Area|Town|Village|City|State)|[A-Za-z]+\s(?:Country))\b",
-            score=0.85
-        )
- 
-        location_recognizer = PatternRecognizer(supported_entity="LOCATION", patterns=[location_pattern])
- 
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(location_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
  
         results = analyzer.analyze(text, language='en', entities=["LOCATION"])
  
@@ -812,8 +871,7 @@ def location_recognizer(text):
             redacted_value = text[result.start:result.end]
             location_output_dict["recognized_values"].append(redacted_value)
  
-        for value in location_output_dict["recognized_values"]:
-            logging.info(f"Recognized Value: {value}")
+        log_recognition_summary("location_recognizer", location_output_dict, text)
  
         return location_output_dict
  
@@ -839,16 +897,11 @@ def date_recognizer(text):
             "recognized_values": []
         }
  
-        # Use datefinder to extract dates from the text
-        matches = datefinder.find_dates(text)
- 
-        # Iterate through the matches and format recognized dates
-        for match in matches:
-            recognized_value = match.strftime("%b %d, %Y")
-            date_output_dict["recognized_values"].append(recognized_value)
+        # Use the configured date engine to extract dates from the text, formatted as "%b %d, %Y"
+        for hit in find_date_spans(text):
+            date_output_dict["recognized_values"].append(hit["value"])
  
-        for value in date_output_dict["recognized_values"]:
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("date_recognizer", date_output_dict, text)
  
         return date_output_dict
  
@@ -856,6 +909,63 @@ def date_recognizer(text):
         logging.error(f"An error occurred: {e}")
         return None
  
+# "datefinder" parses dates with datefinder; "fast" uses the precompiled patterns of date_engine,
+# which only reports dates written in one of DATE_FORMATS
+DATE_ENGINE = os.environ.get("PII_DATE_ENGINE", "datefinder")
+
+def find_date_spans(text):
+    """
+    Finds dates in the text along with their offsets.
+ 
+    Parameters:
+    - text (str): Input text.
+ 
+    Returns:
+    - list: Hit dictionary for each date, with the date formatted as "%b %d, %Y".
+    """
+    if DATE_ENGINE == "fast":
+        return [
+            build_hit("DATE", start, end, 1.0, "date_recognizer", format_date(found))
+            for found, start, end in find_dates(text)
+        ]
+
+    import datefinder
+
+    hits = []
+    for match, (start, end) in datefinder.find_dates(text, index=True):
+        start, end = trim_date_span(text, start, end)
+        hits.append(build_hit("DATE", start, end, 1.0, "date_recognizer", match.strftime("%b %d, %Y")))
+    return hits
+
+# Delimiters and filler words datefinder includes around a date, such as " on March 3, 2020 "
+DATE_SPAN_LEADING = re.compile(
+    r"(?:[\s:\-.,_]+|(?:due|by|on|during|standard|daylight|savings|time|date|dated|of|to|through|between|until|at|day)\b)*",
+    re.IGNORECASE
+)
+DATE_SPAN_TRAILING = re.compile(
+    r"(?:[\s:\-.,_]+|\b(?:due|by|on|during|standard|daylight|savings|time|date|dated|of|to|through|between|until|at|day))*\Z",
+    re.IGNORECASE
+)
+
+def trim_date_span(text, start, end):
+    """
+    Trims a datefinder span to the date it matched.
+ 
+    Parameters:
+    - text (str): Input text.
+    - start (int): Start offset reported by datefinder.
+    - end (int): End offset reported by datefinder.
+ 
+    Returns:
+    - tuple: Start and end offsets of the date text.
+    """
+    span = text[start:end]
+    leading = DATE_SPAN_LEADING.match(span).end()
+    trailing = DATE_SPAN_TRAILING.search(span, leading).start()
+    if trailing <= leading:
+        return start, end
+    return start + leading, start + trailing
+ 
 def AAA_no_recognizer(text):
     """
     Recognizes AAA Number in the text.
@@ -868,11 +978,8 @@ def AAA_no_recognizer(text):
     """
     try:
         logging.info("checking for AAA number")
-        AAA_no_pattern = Pattern(name="AAA_no_pattern", regex=r"\d{2}-\d{2}-\d{4}-\d{4}", score=0.9)
-        AAA_no_recognizer = PatternRecognizer(supported_entity="AAA Number", patterns=[AAA_no_pattern])
-   
-        analyzer = AnalyzerEngine()
-        analyzer.registry.add_recognizer(AAA_no_recognizer)
+        # Use the shared analyzer engine, which already has the recognizer registered
+        analyzer = get_analyzer()
    
         results = analyzer.analyze(text, language='en', entities=["AAA Number"])
    
@@ -887,9 +994,7 @@ def AAA_no_recognizer(text):
             AAA_no_output_dict["entity_type"].append(entity_name)
             AAA_no_output_dict["recognized_values"].append(redacted_value)
    
-        for entity, value in zip(AAA_no_output_dict["entity_type"], AAA_no_output_dict["recognized_values"]):
-            logging.info(f"Entity Type: {entity}")
-            logging.info(f"Recognized Value: {value}\n")
+        log_recognition_summary("AAA_no_recognizer", AAA_no_output_dict, text)
    
         return AAA_no_output_dict
  
@@ -908,80 +1013,1518 @@ def organizations_recognizer(text):
     - dict: Dictionary containing recognized Organizations.
     """
     try:
-        nlp = spacy.load("en_core_web_sm")
+        nlp = get_spacy_nlp()
         doc = nlp(text)
  
-        org_output_dict = {
-            "entity_type": "ORG",
-            "recognized_values": []
-        }
- 
-        for entity in doc.ents:
-            if entity.label_ == "ORG":
-                org_output_dict["recognized_values"].append(entity.text)
- 
-        return org_output_dict
+        return build_org_output_dict(doc)
  
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return None
  
-def main(input_file_path=None, input_text=None, entities_to_extract=[]):
+def organizations_recognizer_batch(texts):
+    """
+    Recognizes Organizations in several texts, running them through spaCy in batches.
+ 
+    Parameters:
+    - texts (list): Input texts.
+ 
+    Returns:
+    - list: Dictionary containing recognized Organizations for each text, in order.
+    """
     try:
-           
-        if input_file_path:
-            file_extension = input_file_path.split('.')[-1].lower()
- 
-            if file_extension == 'pdf':
-                text = extract_text_from_pdf(input_file_path)
-            elif file_extension == 'docx':
-                text = extract_text_from_document(input_file_path)
-            elif file_extension == 'txt':
-                text = extract_text_from_text_file(input_file_path)
-            else:
-                logging.info("Unsupported file format. Please provide a PDF, DOCX, or TXT file.")
-                return
-        elif input_text:
-            text = input_text
-        else:
-            logging.info("Please provide either an input file path or input text.")
-            return
+        nlp = get_spacy_nlp()
  
-        mapping_entities_functions = {
-            "PERSON_NAME": person_recognizer,
-            "TITLES": title_recognizer,
-            "DATES": date_recognizer,
-            "CITIZENSHIP": citizenship_recognizer,
-            "EMAIL": email_recognizer,
-            "ORGANIZATION": organizations_recognizer,
-            "LOCATION": location_recognizer,
-            "CITIZENSHIP" : citizenship_recognizer,
-            "PHONE_NUMBER" : phone_number_recognizer,
-            "CRIMINAL_HISTORY" : criminal_history_recognizer,
-            "RELIGIOUS_AFFLICATION" : religious_affiliations_recognizer,
-            "MEDICAL_HISTORY" : medical_history_recognizer,
-            "SEXUAL_ORIENTATION" : sexual_orientation_recognizer,
-            "TAX_ID" : tax_id_recognizer,
-            "DRIVER_LICENSE": driver_license_recognizer,
-            "BIOMETERIC_IDENTIFIER" : biometric_identifier_recognizer,
-            "PATIENT_ID" : patient_id_recognizer,
-            "GENDERS" : genders_recognizer,
-            "AAA_NUMBERS" : AAA_no_recognizer
-            }
- 
-        results = {}
-                                                       
-        for entity in entities_to_extract:
-            if entity in mapping_entities_functions:
-                function = mapping_entities_functions[entity]
-                result = function(text)
-                results[entity] = result
-           
-       
-        logging.info(results)
-        return results
+        return [build_org_output_dict(doc) for doc in nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE)]
  
     except Exception as e:
-        logging.error(f"An error occurred in the main function: {e}")
-        return {"error": str(e)}
- 
\ No newline at end of file
+        logging.error(f"An error occurred: {e}")
+        return None
+ 
+def build_org_output_dict(doc):
+    """
+    Collects the ORG entities of a processed spaCy document.
+ 
+    Parameters:
+    - doc (Doc): Processed spaCy document.
+ 
+    Returns:
+    - dict: Dictionary containing recognized Organizations.
+    """
+    org_output_dict = {
+        "entity_type": "ORG",
+        "recognized_values": []
+    }
+ 
+    for entity in doc.ents:
+        if entity.label_ == "ORG":
+            org_output_dict["recognized_values"].append(entity.text)
+ 
+    return org_output_dict
+ 
+def find_organization_spans(text):
+    """
+    Finds organizations in the text along with their offsets.
+ 
+    Parameters:
+    - text (str): Input text.
+ 
+    Returns:
+    - list: Hit dictionary for each organization.
+    """
+    return build_org_hits(get_spacy_nlp()(text))
+ 
+def find_organization_spans_batch(texts):
+    """
+    Finds organizations in several texts, running them through spaCy in batches.
+ 
+    Parameters:
+    - texts (list): Input texts.
+ 
+    Returns:
+    - list: Hit dictionaries for each text, in order.
+    """
+    return [build_org_hits(doc) for doc in get_spacy_nlp().pipe(texts, batch_size=SPACY_BATCH_SIZE)]
+ 
+def build_org_hits(doc):
+    """
+    Builds a hit for every ORG entity of a processed spaCy document.
+ 
+    Parameters:
+    - doc (Doc): Processed spaCy document.
+ 
+    Returns:
+    - list: Hit dictionary for each organization.
+    """
+    return [
+        build_hit("ORG", entity.start_char, entity.end_char, 0.85, "organizations_recognizer", entity.text)
+        for entity in doc.ents if entity.label_ == "ORG"
+    ]
+ 
+#Analysis plan
+# Entity names accepted by main(), mapped to the entity type reported in their output
+ENTITY_TYPES = {
+    "PERSON_NAME": "PERSON",
+    "TITLES": "TITLE",
+    "DATES": "DATE",
+    "CITIZENSHIP": "CITIZENSHIP",
+    "EMAIL": "EMAIL",
+    "ORGANIZATION": "ORG",
+    "LOCATION": "LOCATION",
+    "PHONE_NUMBER": "PHONE_NUMBER",
+    "CRIMINAL_HISTORY": "CRIMINAL HISTORY",
+    "RELIGIOUS_AFFLICATION": "RELIGIOUS AFFILIATION",
+    "MEDICAL_HISTORY": "MEDICAL HISTORY",
+    "SEXUAL_ORIENTATION": "SEXUAL ORIENTATION",
+    "TAX_ID": "TAX_ID",
+    "DRIVER_LICENSE": "DRIVER_LICENSE_NUMBER",
+    "BIOMETERIC_IDENTIFIER": "BIOMETRIC_IDENTIFIER",
+    "PATIENT_ID": "PATIENT_ID_NUMBER",
+    "GENDERS": "GENDER",
+    "AAA_NUMBERS": "AAA Number"
+}
+
+# Entities whose output repeats the entity type once per recognized value
+PER_VALUE_ENTITY_TYPES = {
+    "CITIZENSHIP", "PHONE_NUMBER", "CRIMINAL_HISTORY", "MEDICAL_HISTORY", "SEXUAL_ORIENTATION",
+    "TAX_ID", "BIOMETERIC_IDENTIFIER", "PATIENT_ID", "GENDERS", "AAA_NUMBERS"
+}
+
+# Entities recognized outside the analyzer engine, mapped to the function finding their hits
+STANDALONE_RECOGNIZERS = {
+    "DATES": find_date_spans,
+    "ORGANIZATION": find_organization_spans
+}
+
+# Standalone entities that can process many texts at once, mapped to their batch function
+STANDALONE_BATCH_RECOGNIZERS = {
+    "ORGANIZATION": find_organization_spans_batch
+}
+
+def build_hit(entity_type, start, end, score, recognizer, value):
+    """
+    Builds the record of a single recognized entity.
+
+    Parameters:
+    - entity_type (str): Entity type reported by the recognizer.
+    - start (int): Start offset in the analyzed text.
+    - end (int): End offset in the analyzed text.
+    - score (float): Confidence score.
+    - recognizer (str): Name of the recognizer that found the entity.
+    - value (str): Recognized value.
+
+    Returns:
+    - dict: Hit dictionary.
+    """
+    return {
+        "entity_type": entity_type,
+        "start": start,
+        "end": end,
+        "score": score,
+        "recognizer": recognizer,
+        "value": value
+    }
+
+def build_output_dict(entity, recognized_values):
+    """
+    Builds the output dictionary for an entity in the shape its recognizer returns.
+
+    Parameters:
+    - entity (str): Entity name accepted by main().
+    - recognized_values (list): Values recognized for the entity.
+
+    Returns:
+    - dict: Dictionary containing the entity type and recognized values.
+    """
+    entity_type = ENTITY_TYPES[entity]
+    if entity in PER_VALUE_ENTITY_TYPES:
+        entity_type = [entity_type] * len(recognized_values)
+
+    return {
+        "entity_type": entity_type,
+        "recognized_values": recognized_values
+    }
+
+def build_analysis_plan(entities_to_extract):
+    """
+    Groups the requested entities by how they are recognized, so that every
+    analyzer-backed entity is covered by a single analyze() pass.
+
+    Parameters:
+    - entities_to_extract (list): Entity names accepted by main().
+
+    Returns:
+    - dict: Plan with the requested entities in order, the analyzer entity types and the standalone recognizers.
+    """
+    plan = {
+        "entities": [],
+        "analyzer_entities": {},
+        "standalone": {}
+    }
+
+    for entity in entities_to_extract:
+        if entity not in ENTITY_TYPES or entity in plan["entities"]:
+            continue
+
+        plan["entities"].append(entity)
+        if entity in STANDALONE_RECOGNIZERS:
+            plan["standalone"][entity] = STANDALONE_RECOGNIZERS[entity]
+        else:
+            plan["analyzer_entities"][entity] = ENTITY_TYPES[entity]
+
+    return plan
+
+#Chunked analysis
+# Texts longer than this many characters are analyzed in windows of at most this size,
+# which keeps spaCy below its length limit and bounds the memory of each analysis
+CHUNK_SIZE = min(int(os.environ.get("PII_CHUNK_SIZE", 100000)), SPACY_MAX_LENGTH)
+# Characters shared by consecutive windows; must exceed twice the longest entity so none is cut
+CHUNK_OVERLAP = int(os.environ.get("PII_CHUNK_OVERLAP", 500))
+
+SENTENCE_BOUNDARY = re.compile(r"[.!?]\s|\n")
+WHITESPACE = re.compile(r"\s+")
+
+def find_window_end(text, size):
+    """
+    Picks where a window should end: after the last sentence in its second half,
+    else at the last whitespace there, else at the size limit.
+
+    Parameters:
+    - text (str): Remaining text, longer than size.
+    - size (int): Maximum window size.
+
+    Returns:
+    - int: End offset of the window.
+    """
+    end = None
+    for match in SENTENCE_BOUNDARY.finditer(text, size // 2, size):
+        end = match.end()
+    if end is None:
+        for match in WHITESPACE.finditer(text, size // 2, size):
+            end = match.end()
+    return end or size
+
+def find_window_start(text, end, overlap):
+    """
+    Picks where the window after one ending at end should start: overlap characters
+    back, moved forward to the next word so the window does not start mid-word.
+
+    Parameters:
+    - text (str): Remaining text.
+    - end (int): End offset of the previous window.
+    - overlap (int): Characters to share with the previous window.
+
+    Returns:
+    - int: Start offset of the next window.
+    """
+    start = max(end - overlap, 1)
+    match = WHITESPACE.search(text, start, end)
+    return match.end() if match else start
+
+def iter_text_windows(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """
+    Splits a text into overlapping windows on sentence or whitespace boundaries.
+
+    Each window owns the hits that start in its part of the text: up to the middle
+    of its overlap with the next window. Counting a hit only in the window that
+    owns it drops the copies found twice in an overlap, and because the overlap
+    is wider than any entity, the owning window always sees the entity whole.
+
+    Parameters:
+    - text (str): Input text.
+    - size (int): Maximum window size.
+    - overlap (int): Characters shared by consecutive windows.
+
+    Yields:
+    - tuple: Window offset in the text, window text, and the offsets where the window's owned part starts and ends.
+    """
+    offset = 0
+    owned_start = 0
+    while len(text) - offset > size:
+        end = offset + find_window_end(text[offset:offset + size + 1], size)
+        next_offset = offset + find_window_start(text[offset:end], end - offset, overlap)
+        owned_end = (next_offset + end) // 2
+        yield offset, text[offset:end], owned_start, owned_end
+        offset = next_offset
+        owned_start = owned_end
+
+    yield offset, text[offset:], owned_start, len(text)
+
+def analyze_text(plan, text):
+    """
+    Runs an analysis plan over the text, in overlapping windows when it is longer than CHUNK_SIZE.
+
+    Hit offsets from each window are mapped back to positions in the whole text,
+    and hits found by two windows are counted once.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - text (str): Input text.
+
+    Returns:
+    - list: Hit dictionary for every recognized entity.
+    """
+    if len(text) <= CHUNK_SIZE:
+        return analyze_window(plan, text)
+
+    hits = []
+    seen = set()
+    for offset, window, owned_start, owned_end in iter_text_windows(text):
+        for hit in analyze_window(plan, window):
+            hit["start"] += offset
+            hit["end"] += offset
+            key = (hit["entity_type"], hit["start"], hit["end"])
+            if owned_start <= hit["start"] < owned_end and key not in seen:
+                seen.add(key)
+                hits.append(hit)
+
+    return hits
+
+def analyze_window(plan, text):
+    """
+    Runs an analysis plan over a text short enough to analyze in one piece.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - text (str): Input text.
+
+    Returns:
+    - list: Hit dictionary for every recognized entity.
+    """
+    hits = []
+    if plan["analyzer_entities"]:
+        analyzer = get_analyzer()
+        # The NLP pass is run here rather than inside analyze() so it is timed on its own
+        with record_stage("recognizers", "nlp_engine"):
+            nlp_artifacts = analyzer.nlp_engine.process_text(text, 'en')
+        analyzer_results = analyzer.analyze(text, language='en', entities=list(plan["analyzer_entities"].values()), nlp_artifacts=nlp_artifacts)
+        hits.extend(build_analyzer_hits(text, analyzer_results))
+
+    for entity, find_spans in plan["standalone"].items():
+        with record_stage("recognizers", entity):
+            hits.extend(find_spans(text))
+
+    return hits
+
+def analyze_texts(plan, texts):
+    """
+    Runs an analysis plan over several texts in bulk.
+
+    Texts longer than CHUNK_SIZE are analyzed one at a time in windows; the others share batched passes.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - texts (list): Input texts.
+
+    Returns:
+    - list: Hit dictionaries for each text, in order.
+    """
+    texts = list(texts)
+    hits = [None] * len(texts)
+
+    short_indexes = [index for index, text in enumerate(texts) if len(text) <= CHUNK_SIZE]
+    for index, text_hits in zip(short_indexes, analyze_window_batch(plan, [texts[index] for index in short_indexes])):
+        hits[index] = text_hits
+
+    for index, text in enumerate(texts):
+        if hits[index] is None:
+            hits[index] = analyze_text(plan, text)
+
+    return hits
+
+def analyze_window_batch(plan, texts):
+    """
+    Runs an analysis plan over several short texts in bulk.
+
+    The NLP engine processes the texts with one batched pass, and
+    standalone recognizers that support it (such as ORGANIZATION) batch theirs too.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - texts (list): Input texts, each at most CHUNK_SIZE characters.
+
+    Returns:
+    - list: Hit dictionaries for each text, in order.
+    """
+    hits = [[] for _ in texts]
+
+    if plan["analyzer_entities"] and texts:
+        analyzer = get_analyzer()
+        entities = list(plan["analyzer_entities"].values())
+        nlp_batch = iter(analyzer.nlp_engine.process_batch(texts, language='en'))
+
+        for text, text_hits in zip(texts, hits):
+            with record_stage("recognizers", "nlp_engine"):
+                _, nlp_artifacts = next(nlp_batch)
+            analyzer_results = analyzer.analyze(text, language='en', entities=entities, nlp_artifacts=nlp_artifacts)
+            text_hits.extend(build_analyzer_hits(text, analyzer_results))
+
+    for entity, find_spans in plan["standalone"].items():
+        with record_stage("recognizers", entity):
+            if entity in STANDALONE_BATCH_RECOGNIZERS:
+                for text_hits, spans in zip(hits, STANDALONE_BATCH_RECOGNIZERS[entity](texts)):
+                    text_hits.extend(spans)
+            else:
+                for text, text_hits in zip(texts, hits):
+                    text_hits.extend(find_spans(text))
+
+    return hits
+
+def build_analyzer_hits(text, analyzer_results):
+    """
+    Converts analyzer engine results into hit dictionaries.
+
+    Parameters:
+    - text (str): Analyzed text.
+    - analyzer_results (list): RecognizerResult objects returned by the analyzer engine.
+
+    Returns:
+    - list: Hit dictionary for each result.
+    """
+    from presidio_analyzer import RecognizerResult
+
+    hits = []
+    for result in analyzer_results:
+        recognizer = (result.recognition_metadata or {}).get(RecognizerResult.RECOGNIZER_NAME_KEY)
+        hits.append(build_hit(result.entity_type, result.start, result.end, result.score, recognizer, text[result.start:result.end]))
+
+    return hits
+
+#Parallel PDF analysis
+# Worker processes used for PDF files; 0 or 1 analyzes them in the calling process
+PDF_WORKERS = int(os.environ.get("PII_PDF_WORKERS", 0))
+# Page ranges handed out per worker, so uneven pages still spread across the pool
+PDF_RANGES_PER_WORKER = 4
+
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+
+def get_process_pool(workers):
+    """
+    Returns a shared pool of worker processes, creating it on first use.
+
+    Workers keep their analyzer engine and models between tasks, so the load cost
+    is paid once per worker rather than once per document.
+
+    Parameters:
+    - workers (int): Number of worker processes.
+
+    Returns:
+    - ProcessPoolExecutor: Shared process pool of that size.
+    """
+    with _process_pools_lock:
+        if workers not in _process_pools:
+            _process_pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _process_pools[workers]
+
+def analyze_pages(plan, pages):
+    """
+    Runs an analysis plan over each page of a document as the pages arrive.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - pages (iterable): Page number and page text pairs.
+
+    Yields:
+    - tuple: Page number, page length and page-relative hits.
+    """
+    pages = iter(pages)
+    while True:
+        with record_stage("extraction"):
+            page = next(pages, None)
+        if page is None:
+            return
+
+        page_number, page_text = page
+        yield page_number, len(page_text), analyze_text(plan, page_text)
+
+def analyze_pdf_page_range(pdf_path, first_page, last_page, entities_to_extract):
+    """
+    Opens a PDF file and analyzes one range of its pages. Runs inside a worker process.
+
+    Parameters:
+    - pdf_path: Path to the PDF file, or its content as bytes.
+    - first_page (int): First page of the range, starting at 1.
+    - last_page (int): Last page of the range, inclusive.
+    - entities_to_extract (list): Entity names accepted by main().
+
+    Returns:
+    - tuple: Page number, page length and page-relative hits for each page in the range,
+      and the timings of the worker's stages.
+    """
+    plan = build_analysis_plan(entities_to_extract)
+    with collect_timings() as timings:
+        page_results = list(analyze_pages(plan, iter_pdf_pages(pdf_path, first_page, last_page)))
+    return page_results, timings
+
+def merge_page_hits(page_results):
+    """
+    Merges per-page hits in page order, mapping their offsets to positions in the whole document.
+
+    Parameters:
+    - page_results (iterable): Page number, page length and page-relative hits, in page order.
+
+    Returns:
+    - list: Hit dictionary for every recognized entity, tagged with its page number.
+    """
+    hits = []
+    offset = 0
+    for page_number, page_length, page_hits in page_results:
+        for hit in page_hits:
+            hit["start"] += offset
+            hit["end"] += offset
+            hit["page"] = page_number
+            hits.append(hit)
+        offset += page_length
+
+    return hits
+
+def analyze_pdf_pages(plan, pdf_path, workers=None):
+    """
+    Runs an analysis plan over a PDF file page by page, as the pages are extracted.
+
+    With more than one worker, the page range is split across a process pool and
+    every worker opens the document on its own; the results are merged in page order.
+    Hit offsets are mapped back to positions in the text of the whole document and
+    each hit records the page it was found on.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - pdf_path: Path to the PDF file, or its content as bytes or a binary file object.
+    - workers (int): Number of worker processes. Defaults to PDF_WORKERS.
+
+    Returns:
+    - list: Hit dictionary for every recognized entity.
+    """
+    workers = PDF_WORKERS if workers is None else workers
+    if workers <= 1:
+        return merge_page_hits(analyze_pages(plan, iter_pdf_pages(pdf_path)))
+
+    if hasattr(pdf_path, "read"):
+        pdf_path = pdf_path.read()
+    with open_pdf(pdf_path) as pdf_document:
+        page_count = pdf_document.page_count
+
+    # In-memory documents are sent to the workers with every range, so they get one range per worker
+    ranges_per_worker = PDF_RANGES_PER_WORKER if isinstance(pdf_path, str) else 1
+    range_size = max(1, math.ceil(page_count / (workers * ranges_per_worker)))
+    first_pages = range(1, page_count + 1, range_size)
+    last_pages = [first_page + range_size - 1 for first_page in first_pages]
+
+    logging.info(f"analyzing {page_count} pdf pages across {workers} worker processes")
+    pool = get_process_pool(workers)
+    range_results = pool.map(
+        analyze_pdf_page_range,
+        [pdf_path] * len(first_pages), first_pages, last_pages, [plan["entities"]] * len(first_pages)
+    )
+
+    page_results = []
+    for range_pages, range_timings in range_results:
+        page_results.extend(range_pages)
+        merge_timings(range_timings)
+
+    return merge_page_hits(page_results)
+
+def build_plan_output(plan, hits, paged=False):
+    """
+    Splits hits into the output dictionary of each planned entity.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - hits (list): Hit dictionaries found by the plan.
+    - paged (bool): Whether the hits carry page numbers, which are then listed next to the values.
+
+    Returns:
+    - dict: Output dictionary for each planned entity.
+    """
+    hits_by_type = {}
+    for hit in hits:
+        hits_by_type.setdefault(hit["entity_type"], []).append(hit)
+
+    results = {}
+    for entity in plan["entities"]:
+        entity_hits = hits_by_type.get(ENTITY_TYPES[entity], [])
+        results[entity] = build_output_dict(entity, [hit["value"] for hit in entity_hits])
+        if paged:
+            results[entity]["page_numbers"] = [hit["page"] for hit in entity_hits]
+
+    return results
+
+# "values" lists the recognized values per entity; "spans" lists where each hit is in the text;
+# "detect" only tells whether the entities occur, stopping as soon as that is known
+OUTPUT_MODES = ["values", "spans", "detect"]
+# What detect mode checks for: "any" of the requested entities, or "all" of them
+DETECT_CONDITIONS = ["any", "all"]
+
+def build_span_output(plan, hits):
+    """
+    Lists every hit of the planned entities as a compact span, in text order.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - hits (list): Hit dictionaries found by the plan.
+
+    Returns:
+    - dict: "spans" list with the start and end offsets, entity, score and recognizer of
+      each hit, plus its page number for PDF files.
+    """
+    planned = {ENTITY_TYPES[entity]: entity for entity in plan["entities"]}
+
+    spans = []
+    for hit in hits:
+        entity = planned.get(hit["entity_type"])
+        if entity is None:
+            continue
+
+        span = {
+            "start": hit["start"],
+            "end": hit["end"],
+            "entity": entity,
+            "score": hit["score"],
+            "recognizer": hit["recognizer"]
+        }
+        if "page" in hit:
+            span["page"] = hit["page"]
+        spans.append(span)
+
+    spans.sort(key=lambda span: (span.get("page", 0), span["start"], span["end"]))
+    return {"spans": spans}
+
+def build_mode_output(plan, hits, output_mode="values", paged=False):
+    """
+    Builds the output of a plan in the requested output mode.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - hits (list): Hit dictionaries found by the plan.
+    - output_mode (str): One of OUTPUT_MODES.
+    - paged (bool): Whether the hits carry page numbers.
+
+    Returns:
+    - dict: Output of main() in the requested mode.
+    """
+    if output_mode == "spans":
+        return build_span_output(plan, hits)
+    return build_plan_output(plan, hits, paged=paged)
+
+def check_output_mode(output_mode):
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {output_mode}. Expected one of {OUTPUT_MODES}.")
+
+def check_detect_condition(detect_condition):
+    if detect_condition not in DETECT_CONDITIONS:
+        raise ValueError(f"Unknown detect condition: {detect_condition}. Expected one of {DETECT_CONDITIONS}.")
+
+#Warm-up
+# Touches every recognizer, so lazily initialized state is built during warm-up rather than on a request
+WARM_UP_TEXT = (
+    "Dr. John Smith, a US citizen, emailed jane.doe@example.org on March 3, 2020 from Acme Corporation, "
+    "44 Elm Road, Springfield City. Call (555) 123-4567. Tax ID 123-45-6789, patient ABC-12345-X9."
+)
+
+def warm_up():
+    """
+    Loads every model, engine and matcher up front and runs one analysis through them.
+
+    A server can call this in its parent process before forking workers, so the
+    workers share the loaded state copy-on-write instead of each loading their own.
+    """
+    # Imported only so the parent process preloads them before forking workers
+    for module_name in ["datefinder", "docx", "fitz"]:
+        importlib.import_module(module_name)
+
+    start = time.perf_counter()
+    get_deny_list_automaton()
+    get_analyzer()
+    get_anonymizer()
+    get_spacy_nlp()
+    get_recognizer_version()
+    run_analysis_plan(build_analysis_plan(list(ENTITY_TYPES)), WARM_UP_TEXT)
+    logging.info(f"warmed up recognizers in {time.perf_counter() - start:.3f}s")
+
+#Result caching
+# Bump whenever recognizer logic changes in a way that changes results, so cached results are not reused
+RECOGNIZER_LOGIC_VERSION = 1
+
+SUPPORTED_FILE_EXTENSIONS = ['pdf', 'docx', 'txt']
+
+def build_recognizer_version():
+    """
+    Identifies everything that decides the results of a request besides its input:
+    the recognizer logic, the deny-lists, the entity patterns and the spaCy model.
+
+    Returns:
+    - str: Hash identifying the current recognizers.
+    """
+    from importlib import metadata
+
+    components = [
+        str(RECOGNIZER_LOGIC_VERSION),
+        f"deny-list:{ARTIFACT_FORMAT_VERSION}:{deny_list_source_hash()}",
+        f"patterns:{PATTERN_OVERLAP_POLICY}:{PATTERN_DEFINITIONS!r}",
+        f"dates:{DATE_ENGINE}:{DATE_FORMATS!r}",
+        f"spacy:{metadata.version('spacy')}:{SPACY_MODEL}"
+    ]
+    return hash_text("\n".join(components))
+
+_recognizer_version = None
+
+def get_recognizer_version():
+    """
+    Returns the recognizer version, computing it on first use.
+
+    Returns:
+    - str: Hash identifying the current recognizers.
+    """
+    global _recognizer_version
+    if _recognizer_version is None:
+        _recognizer_version = build_recognizer_version()
+    return _recognizer_version
+
+def build_input_cache_key(plan, input_file_path=None, input_text=None, output_mode="values", input_buffer=None, input_type=None):
+    """
+    Builds the result cache key of a main() request from the content it analyzes.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - input_file_path (str): Path of the input file, which takes precedence over input_buffer and input_text.
+    - input_text (str): Input text.
+    - output_mode (str): One of OUTPUT_MODES.
+    - input_buffer: In-memory file content, which takes precedence over input_text.
+    - input_type (str): Declared type of input_buffer.
+
+    Returns:
+    - str: Cache key of the request.
+    """
+    if input_file_path:
+        file_extension = input_file_path.split('.')[-1].lower()
+        return build_cache_key(hash_file(input_file_path), plan["entities"], get_recognizer_version(), kind=file_extension, output_mode=output_mode)
+
+    if input_buffer is not None:
+        return build_cache_key(hash_buffer(input_buffer), plan["entities"], get_recognizer_version(), kind=input_type, output_mode=output_mode)
+
+    return build_cache_key(hash_text(input_text), plan["entities"], get_recognizer_version(), output_mode=output_mode)
+
+def order_plan_output(plan, results):
+    """
+    Orders a cached result like the request, since requests for the same entities share a cache entry.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - results (dict): Output dictionary for each planned entity.
+
+    Returns:
+    - dict: The same output dictionaries, in the order the entities were requested.
+    """
+    if "spans" in results:
+        return results
+    if "detected" in results:
+        return {"detected": results["detected"], "entities": {entity: results["entities"][entity] for entity in plan["entities"]}}
+    return {entity: results[entity] for entity in plan["entities"]}
+
+# Uploads up to this many bytes are handled in memory; larger ones are spooled to a temporary file
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get("PII_UPLOAD_SPOOL_THRESHOLD", 16 * 1024 * 1024))
+
+def get_upload_type(file_name):
+    """
+    Finds the type an uploaded file declares through its extension.
+
+    Parameters:
+    - file_name (str): Name of the uploaded file.
+
+    Returns:
+    - str: Lowercase extension without the dot, or an empty string.
+    """
+    return file_name.rsplit('.', 1)[-1].lower() if file_name and '.' in file_name else ''
+
+def read_upload(upload_stream, file_name, spool_threshold=UPLOAD_SPOOL_THRESHOLD):
+    """
+    Reads an uploaded file into memory, or into a temporary file when it is larger than spool_threshold bytes.
+
+    Parameters:
+    - upload_stream: Binary file object of the upload.
+    - file_name (str): Name of the uploaded file, whose extension declares its type.
+    - spool_threshold (int): Largest upload kept in memory, in bytes.
+
+    Returns:
+    - dict: Input arguments for main(): input_buffer and input_type for an upload kept
+      in memory, or input_file_path of a temporary file that the caller removes.
+    """
+    input_type = get_upload_type(file_name)
+    content = upload_stream.read(spool_threshold + 1)
+    if len(content) <= spool_threshold:
+        return {"input_buffer": content, "input_type": input_type}
+
+    with tempfile.NamedTemporaryFile(suffix=f".{input_type}", delete=False) as temp_file:
+        temp_file.write(content)
+        del content
+        shutil.copyfileobj(upload_stream, temp_file)
+    return {"input_file_path": temp_file.name}
+
+def get_input_source(input_file_path=None, input_buffer=None, input_type=None):
+    """
+    Picks the file an input is read from: a path, which takes precedence, or an in-memory buffer.
+
+    Parameters:
+    - input_file_path (str): Path of a PDF, DOCX or TXT file.
+    - input_buffer: File content as bytes or a binary file object.
+    - input_type (str): Declared type of input_buffer: "pdf", "docx" or "txt".
+
+    Returns:
+    - tuple: The path or buffer and its file type, or None and None for a text input.
+    """
+    if input_file_path:
+        return input_file_path, input_file_path.split('.')[-1].lower()
+    if input_buffer is not None:
+        return input_buffer, (input_type or '').lower().lstrip('.')
+    return None, None
+
+def get_input_size(input_file_path=None, input_text=None, input_buffer=None):
+    """
+    Describes the size of an input for the logs.
+
+    Parameters:
+    - input_file_path (str): Path of the input file.
+    - input_text (str): Input text.
+    - input_buffer: In-memory file content as bytes or a binary file object.
+
+    Returns:
+    - str: Size in bytes of a file or buffer, or in characters of a text.
+    """
+    if input_file_path:
+        return f"{os.path.getsize(input_file_path)} bytes"
+    if input_buffer is None:
+        return f"{len(input_text)} characters"
+    if hasattr(input_buffer, "read"):
+        position = input_buffer.tell()
+        size = input_buffer.seek(0, os.SEEK_END) - position
+        input_buffer.seek(position)
+        return f"{size} bytes"
+    return f"{len(input_buffer)} bytes"
+
+def extract_file_text(source, file_type):
+    """
+    Extracts the text of a DOCX or TXT file from its path or content.
+
+    Parameters:
+    - source: Path of the file, or its content as bytes or a binary file object.
+    - file_type (str): "docx" or "txt".
+
+    Returns:
+    - str: Extracted text.
+    """
+    if file_type == 'docx':
+        return extract_text_from_document(source)
+    return extract_text_from_text_file(source)
+
+#Detect-only mode
+# Recognizers that need no NLP pass; detect mode runs them over the whole input before spaCy
+FAST_RECOGNIZER_NAMES = ["DenyListRecognizer", "FusedPatternRecognizer"]
+
+def contains_date_span(text):
+    """
+    Checks whether the text holds a date, stopping at the first one.
+
+    Parameters:
+    - text (str): Input text.
+
+    Returns:
+    - bool: Whether find_date_spans() would find a date.
+    """
+    if DATE_ENGINE == "fast":
+        return contains_date(text)
+
+    import datefinder
+
+    return next(datefinder.find_dates(text, index=True), None) is not None
+
+# Standalone entities checked without an NLP pass, mapped to the function telling whether they occur
+FAST_STANDALONE_DETECTORS = {
+    "DATES": contains_date_span
+}
+
+def get_nlp_entity_types():
+    """
+    Lists the entity types reported by analyzer recognizers other than the fast ones,
+    which still need the NLP pass when the fast recognizers find nothing.
+
+    Returns:
+    - set: Entity types.
+    """
+    return {
+        entity_type
+        for recognizer in get_analyzer().registry.recognizers if recognizer.name not in FAST_RECOGNIZER_NAMES
+        for entity_type in recognizer.supported_entities
+    }
+
+def find_fast_entities(plan, text, entities, stop_at_first=False):
+    """
+    Finds which entities the pattern, deny-list and date recognizers see in the text.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - text (str): Input text.
+    - entities (list): Entity names still to check.
+    - stop_at_first (bool): Whether to stop at the first entity found.
+
+    Returns:
+    - set: Entity names found.
+    """
+    entity_names = {plan["analyzer_entities"][entity]: entity for entity in entities if entity in plan["analyzer_entities"]}
+
+    found_types = set()
+    pattern_types = [entity_type for entity_type in entity_names if entity_type in PATTERN_ENTITY_TYPES]
+    if pattern_types:
+        with record_stage("recognizers", "FusedPatternRecognizer"):
+            found_types |= find_pattern_entity_types(text, pattern_types, stop_at_first)
+
+    deny_list_types = [entity_type for entity_type in entity_names if entity_type not in found_types]
+    if deny_list_types and not (stop_at_first and found_types):
+        with record_stage("recognizers", "DenyListRecognizer"):
+            found_types |= find_deny_list_categories(get_deny_list_automaton(), text, deny_list_types, stop_at_first)
+
+    found = {entity_names[entity_type] for entity_type in found_types}
+    for entity, contains_entity in FAST_STANDALONE_DETECTORS.items():
+        if entity in entities and entity in plan["standalone"] and not (stop_at_first and found):
+            with record_stage("recognizers", entity):
+                if contains_entity(text):
+                    found.add(entity)
+
+    return found
+
+def find_nlp_entities(plan, text, entities, stop_at_first=False):
+    """
+    Finds which entities the analyzer, with its NLP pass, and the other standalone recognizers see in the text.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - text (str): Input text, at most CHUNK_SIZE characters.
+    - entities (list): Entity names still to check.
+    - stop_at_first (bool): Whether to stop at the first entity found.
+
+    Returns:
+    - set: Entity names found.
+    """
+    entity_names = {plan["analyzer_entities"][entity]: entity for entity in entities if entity in plan["analyzer_entities"]}
+
+    found = set()
+    if entity_names:
+        analyzer = get_analyzer()
+        with record_stage("recognizers", "nlp_engine"):
+            nlp_artifacts = analyzer.nlp_engine.process_text(text, 'en')
+        analyzer_results = analyzer.analyze(text, language='en', entities=list(entity_names), nlp_artifacts=nlp_artifacts)
+        found = {entity_names[result.entity_type] for result in analyzer_results if result.entity_type in entity_names}
+
+    for entity, find_spans in plan["standalone"].items():
+        if entity in entities and entity not in FAST_STANDALONE_DETECTORS and not (stop_at_first and found):
+            with record_stage("recognizers", entity):
+                if find_spans(text):
+                    found.add(entity)
+
+    return found
+
+def is_detection_settled(detected, detect_condition):
+    """
+    Tells whether the answer of a detect-mode check is known.
+
+    Parameters:
+    - detected (dict): True, False or None (not checked yet) for each entity.
+    - detect_condition (str): One of DETECT_CONDITIONS.
+
+    Returns:
+    - bool: Whether checking more of the input cannot change the answer.
+    """
+    values = list(detected.values())
+    if None not in values:
+        return True
+    if detect_condition == "any":
+        return True in values
+    return False in values
+
+def build_detect_output(detected, detect_condition):
+    """
+    Builds the output of detect mode.
+
+    Parameters:
+    - detected (dict): True, False or None for each entity.
+    - detect_condition (str): One of DETECT_CONDITIONS.
+
+    Returns:
+    - dict: Whether the condition is met under "detected", and under "entities" whether each
+      entity occurs, or None for the entities left unchecked once the answer was known.
+    """
+    values = list(detected.values())
+    if detect_condition == "any":
+        met = True in values
+    else:
+        met = bool(values) and all(value is True for value in values)
+    return {"detected": met, "entities": dict(detected)}
+
+def detect_texts(plan, read_texts, detect_condition="any"):
+    """
+    Checks whether the planned entities occur in the texts, with early exits.
+
+    Every entity stops being looked for at its first hit, and the check stops as soon
+    as the condition is settled. The pattern, deny-list and date recognizers run over
+    every text first; the NLP pass only runs, window by window, for the entities they
+    did not find and that an NLP-backed recognizer could still report.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - read_texts (callable): Returns an iterator over the texts of the input, such as its pages.
+      They are consumed lazily, so the texts after the one that settles the check are never
+      read, and read again for the NLP pass instead of being kept in memory.
+    - detect_condition (str): One of DETECT_CONDITIONS.
+
+    Returns:
+    - dict: Output of detect mode, see build_detect_output().
+    """
+    detected = {entity: None for entity in plan["entities"]}
+    stop_at_first = detect_condition == "any"
+
+    def pending():
+        return [entity for entity, value in detected.items() if value is None]
+
+    def mark_found(entities):
+        for entity in entities:
+            detected[entity] = True
+
+    for text in read_texts():
+        mark_found(find_fast_entities(plan, text, pending(), stop_at_first))
+        if is_detection_settled(detected, detect_condition):
+            return build_detect_output(detected, detect_condition)
+
+    nlp_entity_types = get_nlp_entity_types() if any(entity in plan["analyzer_entities"] for entity in pending()) else set()
+    for entity in pending():
+        if entity in plan["standalone"]:
+            needs_nlp = entity not in FAST_STANDALONE_DETECTORS
+        else:
+            needs_nlp = plan["analyzer_entities"][entity] in nlp_entity_types
+        if not needs_nlp:
+            detected[entity] = False
+
+    # The NLP pass is only needed when the fast recognizers do not settle the check
+    if is_detection_settled(detected, detect_condition):
+        return build_detect_output(detected, detect_condition)
+    for text in read_texts():
+        for _, window, _, _ in iter_text_windows(text):
+            if is_detection_settled(detected, detect_condition):
+                return build_detect_output(detected, detect_condition)
+            mark_found(find_nlp_entities(plan, window, pending(), stop_at_first))
+
+    for entity in pending():
+        detected[entity] = False
+    return build_detect_output(detected, detect_condition)
+
+def detect_input(plan, source=None, file_type=None, input_text=None, detect_condition="any"):
+    """
+    Checks whether the planned entities occur in an input, reading PDFs only up to the page that settles the check.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - source: Path of a PDF, DOCX or TXT file, or its content as bytes or a binary file object.
+    - file_type (str): "pdf", "docx" or "txt".
+    - input_text (str): Input text, used when there is no source.
+    - detect_condition (str): One of DETECT_CONDITIONS.
+
+    Returns:
+    - dict: Output of detect mode, see build_detect_output().
+    """
+    if file_type == 'pdf':
+        # Pages are extracted as they are checked, so only the current page is held in memory
+        with open_pdf(source) as pdf_document:
+            return detect_texts(plan, lambda: (page.get_text() for page in pdf_document), detect_condition)
+
+    if source is not None:
+        with record_stage("extraction"):
+            input_text = extract_file_text(source, file_type)
+    return detect_texts(plan, lambda: [input_text], detect_condition)
+
+def run_analysis_plan(plan, text, output_mode="values"):
+    """
+    Runs an analysis plan over the text.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - text (str): Input text.
+    - output_mode (str): One of OUTPUT_MODES.
+
+    Returns:
+    - dict: Output dictionary for each planned entity, or the spans in "spans" mode.
+    """
+    return build_mode_output(plan, analyze_text(plan, text), output_mode)
+ 
+def analyze_input(plan, input_file_path=None, input_text=None, pdf_workers=None, output_mode="values", input_buffer=None, input_type=None, detect_condition="any"):
+    """
+    Extracts the text of the input and runs an analysis plan over it.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - input_file_path (str): Path of a PDF, DOCX or TXT file, which takes precedence over input_buffer and input_text.
+    - input_text (str): Input text.
+    - pdf_workers (int): Number of worker processes for PDF files. Defaults to PDF_WORKERS.
+    - output_mode (str): One of OUTPUT_MODES.
+    - input_buffer: Content of a PDF, DOCX or TXT file as bytes or a binary file object, which takes precedence over input_text.
+    - input_type (str): Declared type of input_buffer: "pdf", "docx" or "txt".
+    - detect_condition (str): One of DETECT_CONDITIONS, used in "detect" mode.
+
+    Returns:
+    - dict: Output dictionary for each planned entity, the spans in "spans" mode, or the detection in "detect" mode.
+    """
+    source, file_type = get_input_source(input_file_path, input_buffer, input_type)
+    if output_mode == "detect":
+        return detect_input(plan, source, file_type, input_text, detect_condition)
+
+    if source is not None:
+        if file_type == 'pdf':
+            # PDFs are recognized page by page as they are extracted
+            hits = analyze_pdf_pages(plan, source, workers=pdf_workers)
+            return build_mode_output(plan, hits, output_mode, paged=True)
+
+        with record_stage("extraction"):
+            text = extract_file_text(source, file_type)
+    else:
+        text = input_text
+
+    return run_analysis_plan(plan, text, output_mode)
+ 
+def main(input_file_path=None, input_text=None, entities_to_extract=[], pdf_workers=None, output_mode="values", input_buffer=None, input_type=None, detect_condition="any"):
+    try:
+        start = time.perf_counter()
+        check_output_mode(output_mode)
+        check_detect_condition(detect_condition)
+        plan = build_analysis_plan(entities_to_extract)
+        # Detections for different conditions stop at different points, so they are cached apart
+        cache_mode = f"detect:{detect_condition}" if output_mode == "detect" else output_mode
+ 
+        source, file_type = get_input_source(input_file_path, input_buffer, input_type)
+        if source is not None:
+            if file_type not in SUPPORTED_FILE_EXTENSIONS:
+                logging.info("Unsupported file format. Please provide a PDF, DOCX, or TXT file.")
+                return
+        elif not input_text:
+            logging.info("Please provide either an input file path or input text.")
+            return
+ 
+        # Repeated documents are answered from the cache, keyed on their content
+        result_cache = get_result_cache()
+        cache_key = build_input_cache_key(plan, input_file_path, input_text, cache_mode, input_buffer, file_type) if result_cache.enabled else None
+        input_size = get_input_size(input_file_path, input_text, input_buffer)
+        results = result_cache.get(cache_key) if cache_key else None
+        if results is not None:
+            results = order_plan_output(plan, results)
+            log_extraction_summary("main", [results], input_size, time.perf_counter() - start, cached=1)
+            return results
+ 
+        results = analyze_input(plan, input_file_path, input_text, pdf_workers, output_mode, input_buffer, file_type, detect_condition)
+        if cache_key:
+            result_cache.put(cache_key, results)
+ 
+        log_extraction_summary("main", [results], input_size, time.perf_counter() - start)
+        return results
+ 
+    except Exception as e:
+        logging.error(f"An error occurred in the main function: {e}")
+        return {"error": str(e)}
+
+def main_batch(input_texts=[], entities_to_extract=[], output_mode="values", detect_condition="any"):
+    """
+    Extracts the same entities from many texts in one call.
+
+    Parameters:
+    - input_texts (list): Texts to analyze.
+    - entities_to_extract (list): Entity names to extract from every text.
+    - output_mode (str): One of OUTPUT_MODES.
+    - detect_condition (str): One of DETECT_CONDITIONS, used in "detect" mode.
+
+    Returns:
+    - list: Results for each text, in order, shaped like the output of main().
+    """
+    try:
+        start = time.perf_counter()
+        check_output_mode(output_mode)
+        check_detect_condition(detect_condition)
+        plan = build_analysis_plan(entities_to_extract)
+        cache_mode = f"detect:{detect_condition}" if output_mode == "detect" else output_mode
+        input_texts = list(input_texts)
+        results = [None] * len(input_texts)
+
+        # Only the texts missing from the result cache are analyzed
+        result_cache = get_result_cache()
+        cache_keys = [None] * len(input_texts)
+        if result_cache.enabled:
+            for index, text in enumerate(input_texts):
+                cache_keys[index] = build_input_cache_key(plan, input_text=text, output_mode=cache_mode)
+                cached = result_cache.get(cache_keys[index])
+                if cached is not None:
+                    results[index] = order_plan_output(plan, cached)
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if output_mode == "detect":
+            # Each text stops at its own point, so detections are not batched
+            for index in missing:
+                results[index] = detect_texts(plan, lambda: [input_texts[index]], detect_condition)
+        else:
+            batch_hits = analyze_texts(plan, [input_texts[index] for index in missing])
+            for index, text_hits in zip(missing, batch_hits):
+                results[index] = build_mode_output(plan, text_hits, output_mode)
+
+        for index in missing:
+            if cache_keys[index]:
+                result_cache.put(cache_keys[index], results[index])
+
+        input_size = f"{sum(len(text) for text in input_texts)} characters"
+        log_extraction_summary("main_batch", results, input_size, time.perf_counter() - start, cached=len(input_texts) - len(missing))
+        return results
+
+    except Exception as e:
+        logging.error(f"An error occurred in the main_batch function: {e}")
+        return {"error": str(e)}
+
+#Redaction
+# Operators an entity can be redacted with; entities without one are replaced by their name
+REDACTION_OPERATORS = ["replace", "mask", "hash"]
+# Default for the mask operator, larger than any value, so the whole value is masked
+MASK_ALL_CHARS = 1000000000
+
+_anonymizer = None
+_anonymizer_lock = threading.Lock()
+
+def get_anonymizer():
+    """
+    Returns the process-wide anonymizer engine, building it on first use.
+
+    Returns:
+    - AnonymizerEngine: Shared anonymizer engine.
+    """
+    global _anonymizer
+    if _anonymizer is None:
+        with _anonymizer_lock:
+            if _anonymizer is None:
+                from presidio_anonymizer import AnonymizerEngine
+
+                _anonymizer = AnonymizerEngine()
+    return _anonymizer
+
+def build_operator_configs(plan, operators=None):
+    """
+    Builds the anonymizer operator of each planned entity.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - operators (dict): Operator of each entity name, such as {"EMAIL": {"type": "mask", "masking_char": "#"}}.
+      "type" is one of REDACTION_OPERATORS and the other keys are the operator's parameters.
+      Entities without an operator are replaced by their name in angle brackets.
+
+    Returns:
+    - dict: OperatorConfig for each planned entity type.
+    """
+    from presidio_anonymizer.entities import OperatorConfig
+
+    operators = operators or {}
+    unplanned = [entity for entity in operators if entity not in plan["entities"]]
+    if unplanned:
+        raise ValueError(f"Operators given for entities that are not extracted: {unplanned}")
+
+    operator_configs = {}
+    for entity in plan["entities"]:
+        operator = operators.get(entity) or {}
+        if not isinstance(operator, dict):
+            raise ValueError(f"operator for {entity} must be an object with a 'type' key")
+        params = dict(operator)
+        operator_name = params.pop("type", "replace")
+        if operator_name not in REDACTION_OPERATORS:
+            raise ValueError(f"Unknown operator for {entity}: {operator_name}. Expected one of {REDACTION_OPERATORS}.")
+
+        if operator_name == "replace":
+            params.setdefault("new_value", f"<{entity}>")
+        elif operator_name == "mask":
+            params.setdefault("masking_char", "*")
+            params.setdefault("chars_to_mask", MASK_ALL_CHARS)
+            params.setdefault("from_end", False)
+        operator_configs[ENTITY_TYPES[entity]] = OperatorConfig(operator_name, params)
+
+    return operator_configs
+
+def remove_overlapping_hits(hits, start=0):
+    """
+    Makes hits disjoint so every character is redacted at most once. A hit starting
+    inside the one before it, or in text that has already been redacted, is dropped
+    rather than cut, so the result does not depend on where a text is split into windows.
+
+    Parameters:
+    - hits (list): Hit dictionaries.
+    - start (int): Offset before which text has already been redacted.
+
+    Returns:
+    - list: Entity type, start and end offsets and score of each remaining hit, in text order.
+    """
+    spans = []
+    last_end = start
+    # Of hits on the same span, the highest scoring one is kept, ties going to the first entity type by name
+    for hit in sorted(hits, key=lambda hit: (hit["start"], -hit["end"], -hit["score"], hit["entity_type"])):
+        if hit["start"] < last_end:
+            continue
+        spans.append((hit["entity_type"], hit["start"], hit["end"], hit["score"]))
+        last_end = hit["end"]
+
+    return spans
+
+# Gap across which the anonymizer merges two hits of the same entity type into one
+MERGED_SPAN_GAP = re.compile(r" +")
+
+def merge_adjacent_spans(text, spans):
+    """
+    Merges consecutive spans of the same entity type separated only by spaces, as the
+    anonymizer would, so the merge does not depend on which window the spans came from.
+
+    Parameters:
+    - text (str): Whole text.
+    - spans (list): Disjoint spans built by remove_overlapping_hits(), in text order.
+
+    Returns:
+    - list: Spans with each run of adjacent same-type spans replaced by one span.
+    """
+    merged = []
+    for span in spans:
+        if merged and merged[-1][0] == span[0] and MERGED_SPAN_GAP.fullmatch(text, merged[-1][2], span[1]):
+            merged[-1] = (span[0], merged[-1][1], span[2], span[3])
+        else:
+            merged.append(span)
+    return merged
+
+def redact_segment(text, spans, offset, operator_configs):
+    """
+    Applies the operators to the spans of one segment of a text.
+
+    Parameters:
+    - text (str): Segment text.
+    - spans (list): Disjoint spans built by remove_overlapping_hits(), with offsets in the whole text.
+    - offset (int): Offset of the segment in the whole text.
+    - operator_configs (dict): Operators built by build_operator_configs().
+
+    Returns:
+    - str: Redacted segment.
+    """
+    from presidio_anonymizer.entities import RecognizerResult
+
+    if not spans:
+        return text
+
+    analyzer_results = [
+        RecognizerResult(entity_type, start - offset, end - offset, score)
+        for entity_type, start, end, score in spans
+    ]
+    return get_anonymizer().anonymize(text=text, analyzer_results=analyzer_results, operators=operator_configs).text
+
+def iter_redacted_windows(plan, text, operator_configs, counts):
+    """
+    Redacts a text window by window, yielding each redacted part as soon as it is ready.
+
+    A window's part ends where its owned part does, or later when a hit runs past
+    that point, and the next window's hits starting before that are dropped. The last
+    span of a window is held back for the next part, so it is merged with adjacent
+    hits of the same type found by the next window as it would be in the whole text.
+
+    Parameters:
+    - plan (dict): Plan built by build_analysis_plan().
+    - text (str): Input text.
+    - operator_configs (dict): Operators built by build_operator_configs().
+    - counts (dict): Number of redacted values per entity type, updated as the text is redacted.
+
+    Yields:
+    - str: Consecutive parts of the redacted text.
+    """
+    cursor = 0
+    last_end = 0
+    held = []
+    for offset, window, owned_start, owned_end in iter_text_windows(text):
+        hits = []
+        for hit in analyze_window(plan, window):
+            hit["start"] += offset
+            hit["end"] += offset
+            if owned_start <= hit["start"] < owned_end:
+                hits.append(hit)
+
+        new_spans = remove_overlapping_hits(hits, last_end)
+        for entity_type, _, _, _ in new_spans:
+            counts[entity_type] = counts.get(entity_type, 0) + 1
+
+        spans = merge_adjacent_spans(text, held + new_spans)
+        last_end = max([last_end] + [end for _, _, end, _ in spans])
+        cut = len(text) if owned_end == len(text) else max(owned_end, last_end)
+        held = []
+        if spans and cut < len(text):
+            held = [spans.pop()]
+            cut = held[0][1]
+
+        yield redact_segment(text[cursor:cut], spans, cursor, operator_configs)
+        cursor = cut
+
+def generate_redacted_text(plan, operator_configs, input_file_path=None, input_text=None, input_buffer=None, input_type=None):
+    start = time.perf_counter()
+    counts = {}
+    input_size = get_input_size(input_file_path, input_text, input_buffer)
+
+    source, file_type = get_input_source(input_file_path, input_buffer, input_type)
+    if file_type == 'pdf':
+        # PDFs are redacted page by page as they are extracted
+        for _, page_text in iter_pdf_pages(source):
+            yield from iter_redacted_windows(plan, page_text, operator_configs, counts)
+    else:
+        text = extract_file_text(source, file_type) if source is not None else input_text
+        yield from iter_redacted_windows(plan, text, operator_configs, counts)
+
+    logging.info(f"redact redacted {sum(counts.values())} values ({input_size}) in {time.perf_counter() - start:.3f}s, values per entity: {counts}")
+
+def iter_redacted_text(input_file_path=None, input_text=None, entities_to_extract=[], operators=None, input_buffer=None, input_type=None):
+    """
+    Detects the requested entities and redacts them in one pass, yielding the
+    redacted text in parts so a large document never has a full redacted copy in memory.
+
+    The request is checked before anything is yielded, so invalid requests raise here
+    rather than partway through the output.
+
+    Parameters:
+    - input_file_path (str): Path of a PDF, DOCX or TXT file, which takes precedence over input_text.
+    - input_text (str): Input text.
+    - entities_to_extract (list): Entity names to redact.
+    - operators (dict): Operator of each entity name, see build_operator_configs().
+    - input_buffer: Content of a PDF, DOCX or TXT file as bytes or a binary file object, which takes precedence over input_text.
+    - input_type (str): Declared type of input_buffer: "pdf", "docx" or "txt".
+
+    Returns:
+    - generator: Consecutive parts of the redacted text.
+    """
+    plan = build_analysis_plan(entities_to_extract)
+    operator_configs = build_operator_configs(plan, operators)
+
+    source, file_type = get_input_source(input_file_path, input_buffer, input_type)
+    if source is not None:
+        if file_type not in SUPPORTED_FILE_EXTENSIONS:
+            raise ValueError("Unsupported file format. Please provide a PDF, DOCX, or TXT file.")
+        if input_file_path and not os.path.isfile(input_file_path):
+            raise ValueError(f"Input file not found: {input_file_path}")
+    elif not input_text:
+        raise ValueError("Please provide either an input file path or input text.")
+
+    return generate_redacted_text(plan, operator_configs, input_file_path, input_text, input_buffer, file_type)
+
+def redact(input_file_path=None, input_text=None, entities_to_extract=[], operators=None, input_buffer=None, input_type=None):
+    """
+    Detects the requested entities and redacts them in one pass.
+
+    Parameters:
+    - input_file_path (str): Path of a PDF, DOCX or TXT file, which takes precedence over input_text.
+    - input_text (str): Input text.
+    - entities_to_extract (list): Entity names to redact.
+    - operators (dict): Operator of each entity name, see build_operator_configs().
+    - input_buffer: Content of a PDF, DOCX or TXT file as bytes or a binary file object, which takes precedence over input_text.
+    - input_type (str): Declared type of input_buffer: "pdf", "docx" or "txt".
+
+    Returns:
+    - dict: The redacted text under "redacted_text".
+    """
+    try:
+        redacted_parts = iter_redacted_text(input_file_path, input_text, entities_to_extract, operators, input_buffer, input_type)
+        return {"redacted_text": "".join(redacted_parts)}
+
+    except Exception as e:
+        logging.error(f"An error occurred in the redact function: {e}")
+        return {"error": str(e)}
+
+#NDJSON streaming
+def analyze_ndjson_line(line, line_number, entities_to_extract=[], output_mode="values", detect_condition="any"):
+    """
+    Analyzes one line of a newline-delimited JSON stream of texts.
+
+    A line holds a JSON string with the text, or a JSON object with the text under
+    "input_text" and optionally an "id" to echo back and its own "entities_to_extract",
+    "output_mode" and "detect_condition". A bad line gets an error record, so the rest of the stream
+    is still analyzed.
+
+    Parameters:
+    - line (str or bytes): The line.
+    - line_number (int): Position of the line in the stream, starting at 1.
+    - entities_to_extract (list): Entity names to extract when the line does not name its own.
+    - output_mode (str): Output mode when the line does not give its own.
+    - detect_condition (str): Detect condition when the line does not give its own.
+
+    Returns:
+    - str: Output line ending with a newline: a JSON object with the "line" number,
+      the "id" if one was given, and the "results" of main() or an "error".
+    """
+    record = {"line": line_number}
+    try:
+        data = json.loads(line)
+        if isinstance(data, str):
+            data = {"input_text": data}
+        if not isinstance(data, dict) or not isinstance(data.get("input_text"), str):
+            raise ValueError("Each line must be a JSON string or an object with an 'input_text' string.")
+        if "id" in data:
+            record["id"] = data["id"]
+
+        results = main(
+            input_text=data["input_text"],
+            entities_to_extract=data.get("entities_to_extract", entities_to_extract),
+            output_mode=data.get("output_mode", output_mode),
+            detect_condition=data.get("detect_condition", detect_condition)
+        )
+        if results is None:
+            record["error"] = "'input_text' is empty."
+        elif "error" in results:
+            record["error"] = results["error"]
+        else:
+            record["results"] = results
+
+    except ValueError as e:
+        record["error"] = str(e)
+
+    return json.dumps(record) + "\n"
+
+if __name__ == "__main__":
+    # python -m pii_identifier scan <paths...>
+    import sys
+    from scanner import run_cli
+
+    sys.exit(run_cli())
@@ -0,0 +1,293 @@
+"""
+Serves the FastAPI or Flask app from workers forked off a warmed-up parent.
+
+The parent loads the models, engines and matchers once, freezes them out of the
+garbage collector's reach and then forks the workers, which share those pages
+copy-on-write instead of each loading their own copy:
+
+    python prefork_server.py --app fastapi --workers 4 --port 8000
+    python prefork_server.py --app flask --workers 4 --port 5000
+
+The memory saved per worker can be measured with:
+
+    python prefork_server.py --measure-memory --workers 4
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_WORKERS = int(os.environ.get("PII_SERVER_WORKERS", os.cpu_count() or 1))
+
+
+def preload(app_name=None):
+    """
+    Imports the app and warms up the recognizers, then freezes every object loaded so far.
+
+    gc.freeze() moves the loaded objects to a generation the collector never scans,
+    so collections in the workers do not write to, and so copy, the shared pages.
+
+    Parameters:
+    - app_name (str): "fastapi" or "flask". Only the recognizers are loaded when None.
+
+    Returns:
+    - The WSGI or ASGI application, or None when no app was named.
+    """
+    from pii_identifier import warm_up
+
+    app = None
+    if app_name == "fastapi":
+        from app_FastAPI import app
+    elif app_name == "flask":
+        from app_PostMan import app
+    elif app_name is not None:
+        raise ValueError(f"Unknown app: {app_name}")
+
+    warm_up()
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def bind_socket(host, port):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(2048)
+    listener.set_inheritable(True)
+    return listener
+
+
+def serve_worker(app_name, app, listener):
+    """
+    Serves requests on the shared listening socket. Runs inside a forked worker.
+
+    Parameters:
+    - app_name (str): "fastapi" or "flask".
+    - app: The WSGI or ASGI application.
+    - listener (socket.socket): Listening socket bound by the parent.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    if app_name == "fastapi":
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        server.run(sockets=[listener])
+    else:
+        from werkzeug.serving import make_server
+
+        host, port = listener.getsockname()[:2]
+        make_server(host, port, app, threaded=True, fd=listener.fileno()).serve_forever()
+
+
+def fork_worker(target, *args):
+    """
+    Forks a worker process that runs target(*args) and exits.
+
+    Parameters:
+    - target (callable): Function the worker runs.
+    - args: Arguments passed to the function.
+
+    Returns:
+    - int: Process ID of the worker.
+    """
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            target(*args)
+        except Exception:
+            logging.exception("worker failed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def run_server(app_name, host, port, workers):
+    """
+    Preloads the app, forks the workers and restarts any worker that dies until stopped.
+
+    Parameters:
+    - app_name (str): "fastapi" or "flask".
+    - host (str): Address to listen on.
+    - port (int): Port to listen on.
+    - workers (int): Number of worker processes.
+    """
+    app = preload(app_name)
+    listener = bind_socket(host, port)
+
+    children = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children.add(fork_worker(serve_worker, app_name, app, listener))
+    logging.info(f"serving {app_name} on {host}:{port} with {workers} preloaded workers")
+    print(f"Serving {app_name} on http://{host}:{port} with {workers} preloaded workers", file=sys.stderr)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        children.discard(pid)
+        if not stopping:
+            logging.warning(f"worker {pid} exited, starting a replacement")
+            children.add(fork_worker(serve_worker, app_name, app, listener))
+
+
+#Memory measurement
+def read_memory(pid):
+    """
+    Reads the memory use of a process from /proc/<pid>/smaps_rollup (Linux only).
+
+    Parameters:
+    - pid (int): Process ID.
+
+    Returns:
+    - dict: Resident (rss), proportional (pss) and unique (uss) memory in bytes.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+def probe_worker(preloaded, ready_fd):
+    """
+    Loads the recognizers unless the parent already did, runs one request and waits to be measured.
+
+    Parameters:
+    - preloaded (bool): Whether the parent warmed up before forking.
+    - ready_fd (int): Pipe to report readiness on.
+    """
+    from pii_identifier import ENTITY_TYPES, WARM_UP_TEXT, main, warm_up
+
+    if not preloaded:
+        warm_up()
+    main(input_text=WARM_UP_TEXT + " A request.", entities_to_extract=list(ENTITY_TYPES))
+    gc.collect()
+
+    os.write(ready_fd, b"1")
+    signal.pause()
+
+
+def probe_memory(mode, workers):
+    """
+    Forks workers in one serving mode and measures their memory. Runs in a fresh interpreter.
+
+    Parameters:
+    - mode (str): "preload" to warm up in the parent before forking, "independent" to load in every worker.
+    - workers (int): Number of workers.
+
+    Returns:
+    - dict: Memory of the parent and of each worker.
+    """
+    preloaded = mode == "preload"
+    if preloaded:
+        preload()
+
+    read_fd, write_fd = os.pipe()
+    pids = [fork_worker(probe_worker, preloaded, write_fd) for _ in range(workers)]
+    for _ in pids:
+        os.read(read_fd, 1)
+    time.sleep(0.5)
+
+    try:
+        return {
+            "parent": read_memory(os.getpid()),
+            "workers": [read_memory(pid) for pid in pids]
+        }
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+
+def summarize_workers(probe):
+    workers = probe["workers"]
+    return {
+        "parent": probe["parent"],
+        "workers": workers,
+        "mean_uss": statistics.mean(worker["uss"] for worker in workers),
+        "mean_pss": statistics.mean(worker["pss"] for worker in workers),
+        "total_pss": probe["parent"]["pss"] + sum(worker["pss"] for worker in workers)
+    }
+
+
+def measure_memory(workers):
+    """
+    Compares the memory of workers that each load the recognizers with workers forked from a preloaded parent.
+
+    Unique memory (USS) is what each worker adds on its own; proportional memory (PSS)
+    splits shared pages between the processes that map them.
+
+    Parameters:
+    - workers (int): Number of workers in each mode.
+
+    Returns:
+    - dict: Memory report of both modes and the unique memory saved per worker.
+    """
+    report = {"workers": workers}
+    for mode in ["independent", "preload"]:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--memory-probe", mode, "--workers", str(workers)],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        report[mode] = summarize_workers(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report["uss_saved_per_worker"] = report["independent"]["mean_uss"] - report["preload"]["mean_uss"]
+    report["total_pss_saved"] = report["independent"]["total_pss"] - report["preload"]["total_pss"]
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the PII Identifier apps from preloaded, forked workers.")
+    parser.add_argument("--app", choices=["fastapi", "flask"], default="fastapi", help="App to serve.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of worker processes.")
+    parser.add_argument("--measure-memory", action="store_true",
+                        help="Print a JSON comparison of per-worker memory with and without preloading, then exit.")
+    parser.add_argument("--memory-probe", choices=["independent", "preload"], help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.memory_probe:
+        print(json.dumps(probe_memory(args.memory_probe, args.workers)))
+    elif args.measure_memory:
+        print(json.dumps(measure_memory(args.workers), indent=2))
+    else:
+        run_server(args.app, args.host, args.port, args.workers)
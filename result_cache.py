@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for cached results; 0 turns the cache off
+CACHE_MAX_BYTES = int(os.environ.get("PII_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Seconds a cached result stays valid; 0 keeps results until they are evicted
+CACHE_TTL = float(os.environ.get("PII_CACHE_TTL", 3600))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_text(text):
+    """
+    Hashes a text for use in a cache key.
+
+    Parameters:
+    - text (str): Text to hash.
+
+    Returns:
+    - str: SHA-256 hex digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def hash_file(file_path):
+    """
+    Hashes the content of a file for use in a cache key, reading it in chunks.
+
+    Parameters:
+    - file_path (str): Path of the file.
+
+    Returns:
+    - str: SHA-256 hex digest of the file content.
+    """
+    with open(file_path, 'rb') as input_file:
+        return hash_buffer(input_file)
+
+
+def hash_buffer(buffer):
+    """
+    Hashes in-memory content for use in a cache key.
+
+    Parameters:
+    - buffer: Bytes, or a binary file object, which is read in chunks and rewound to where it was.
+
+    Returns:
+    - str: SHA-256 hex digest of the content.
+    """
+    if not hasattr(buffer, "read"):
+        return hashlib.sha256(buffer).hexdigest()
+
+    digest = hashlib.sha256()
+    position = buffer.tell()
+    for chunk in iter(lambda: buffer.read(_HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    buffer.seek(position)
+    return digest.hexdigest()
+
+
+def build_cache_key(content_hash, entities, version, kind="text", output_mode="values"):
+    """
+    Builds a content-addressed cache key.
+
+    Parameters:
+    - content_hash (str): Hash of the analyzed text or file.
+    - entities (list): Requested entities; their order does not matter.
+    - version (str): Version of the recognizers that produce the result.
+    - kind (str): What the content is, such as "text" or a file extension.
+    - output_mode (str): Shape of the cached result, such as "values" or "spans".
+
+    Returns:
+    - str: SHA-256 hex digest identifying the result.
+    """
+    key = "\0".join([version, kind, output_mode, ",".join(sorted(entities)), content_hash])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of extraction results with a time-to-live and a memory budget.
+
+    Results are stored pickled, which gives every entry an exact size to count
+    against the budget and hands each caller its own copy of a cached result.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """
+        Looks up a cached result.
+
+        Parameters:
+        - key (str): Key built by build_cache_key().
+
+        Returns:
+        - The cached result, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, payload = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return pickle.loads(payload)
+
+    def put(self, key, result):
+        """
+        Stores a result, evicting the least recently used entries to stay within the budget.
+
+        Parameters:
+        - key (str): Key built by build_cache_key().
+        - result: Picklable result to cache.
+        """
+        if not self.enabled:
+            return
+
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            logger.debug(f"result of {len(payload)} bytes exceeds the cache budget")
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, payload)
+            self._size += len(payload)
+
+            while self._size > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, payload = self._entries.pop(key)
+        self._size -= len(payload)
+
+    def clear(self):
+        """
+        Drops every cached result. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """
+        Reports the cache counters.
+
+        Returns:
+        - dict: Hits, misses, evictions, expirations, entry count, bytes used and budget.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl
+            }
+
+
+_result_cache = ResultCache()
+
+
+def get_result_cache():
+    """
+    Returns the process-wide result cache.
+
+    Returns:
+    - ResultCache: Shared result cache.
+    """
+    return _result_cache
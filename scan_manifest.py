@@ -0,0 +1,155 @@
+import sqlite3
+import time
+
+# Rows written between commits unless the caller commits sooner; a crash loses at most this many
+# updates, whose files are scanned again
+MANIFEST_COMMIT_EVERY = 500
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    content_hash TEXT,
+    recognizer_version TEXT,
+    scan_options TEXT,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class ScanManifest:
+    """
+    SQLite record of the documents a directory scan has seen, so an interrupted scan
+    can resume and a repeat scan can skip the documents that have not changed.
+
+    Every document is marked pending before it is analyzed and done or error after,
+    together with its size, modification time, content hash and the recognizer
+    version and scan options it was analyzed with.
+    """
+
+    def __init__(self, path, commit_every=MANIFEST_COMMIT_EVERY):
+        self.path = path
+        self.commit_every = commit_every
+        self._connection = sqlite3.connect(path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode a commit then survives the process being killed without waiting for the disk
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def get(self, path):
+        """
+        Looks up a document.
+
+        Parameters:
+        - path (str): Path of the document.
+
+        Returns:
+        - dict: The document's row, or None if it was never scanned.
+        """
+        row = self._connection.execute("SELECT * FROM documents WHERE path = ?", (path,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def is_current(self, row, stat, recognizer_version, scan_options):
+        """
+        Checks whether a document was analyzed successfully in its current state with the current recognizers.
+
+        Parameters:
+        - row (dict): The document's row, or None.
+        - stat (os.stat_result): Current status of the file.
+        - recognizer_version (str): Current recognizer version.
+        - scan_options (str): Current scan options.
+
+        Returns:
+        - bool: Whether the document can be skipped without reading it.
+        """
+        return (
+            self.has_current_result(row, recognizer_version, scan_options)
+            and row["size"] == stat.st_size
+            and row["mtime_ns"] == stat.st_mtime_ns
+        )
+
+    def has_current_result(self, row, recognizer_version, scan_options):
+        """
+        Checks whether a document's last result was produced by the current recognizers and scan options.
+
+        Parameters:
+        - row (dict): The document's row, or None.
+        - recognizer_version (str): Current recognizer version.
+        - scan_options (str): Current scan options.
+
+        Returns:
+        - bool: Whether the result is still valid for unchanged content.
+        """
+        return (
+            row is not None
+            and row["status"] == STATUS_DONE
+            and row["recognizer_version"] == recognizer_version
+            and row["scan_options"] == scan_options
+        )
+
+    def mark_pending(self, path):
+        """
+        Marks a document as being scanned, keeping what is known about its last scan.
+
+        Parameters:
+        - path (str): Path of the document.
+        """
+        self._connection.execute(
+            "INSERT INTO documents (path, status, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+            (path, STATUS_PENDING, time.time())
+        )
+        self._written()
+
+    def record(self, path, size, mtime_ns, content_hash, recognizer_version, scan_options, status):
+        """
+        Records the outcome of a document's scan.
+
+        Parameters:
+        - path (str): Path of the document.
+        - size (int): File size in bytes.
+        - mtime_ns (int): Modification time in nanoseconds.
+        - content_hash (str): Hash of the file content.
+        - recognizer_version (str): Recognizer version the document was analyzed with.
+        - scan_options (str): Scan options the document was analyzed with.
+        - status (str): STATUS_DONE or STATUS_ERROR.
+        """
+        self._connection.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(path, size, mtime_ns, content_hash, recognizer_version, scan_options, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, content_hash, recognizer_version, scan_options, status, time.time())
+        )
+        self._written()
+
+    def _written(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def stats(self):
+        """
+        Counts the documents in each status.
+
+        Returns:
+        - dict: Number of documents per status.
+        """
+        rows = self._connection.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        self.commit()
+        self._connection.close()
@@ -0,0 +1,346 @@
+"""
+Scans files and directories for PII from the command line:
+
+    python -m pii_identifier scan docs/ notes.txt --workers 8 --output results.jsonl
+
+Directories are walked recursively for PDF, DOCX and TXT files, which are
+analyzed in a pool of worker processes. One JSON line is written per document,
+to the output file or to stdout, and progress is reported on stderr.
+
+With --manifest, the scan keeps a SQLite manifest of the documents it has
+analyzed. An interrupted scan picks up where it stopped, and a repeat scan only
+analyzes the documents that changed since, unless the recognizers or
+deny-lists changed, in which case every document is analyzed again:
+
+    python -m pii_identifier scan docs/ --manifest scan.sqlite --output results.jsonl
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import argparse
+import json
+import os
+import sys
+import time
+
+from scan_manifest import STATUS_DONE, STATUS_ERROR, ScanManifest
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 1.0
+# Documents queued per worker, which keeps memory flat however many files are scanned
+QUEUED_PER_WORKER = 4
+
+
+def iter_input_files(paths, extensions):
+    """
+    Lists the files to scan, walking directories recursively in a stable order.
+
+    Parameters:
+    - paths (list): Files and directories.
+    - extensions (list): File extensions to pick up in directories.
+
+    Yields:
+    - str: Path of each file. Files named directly are yielded whatever their extension.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for directory, subdirectories, file_names in os.walk(path):
+            subdirectories.sort()
+            for file_name in sorted(file_names):
+                if file_name.rsplit('.', 1)[-1].lower() in extensions:
+                    yield os.path.join(directory, file_name)
+
+
+def scan_file(path, entities_to_extract, output_mode="values", hash_content=False, known_hash=None, detect_condition="any"):
+    """
+    Analyzes one file. Runs inside a worker process.
+
+    Parameters:
+    - path (str): Path of the file.
+    - entities_to_extract (list): Entity names to extract.
+    - output_mode (str): Output mode of main().
+    - hash_content (bool): Whether to add the modification time and content hash of the file to the record.
+    - known_hash (str): Content hash of the last successful scan, if its result is still valid.
+      The file is not analyzed again when its content hash matches.
+    - detect_condition (str): Detect condition of main(), used in "detect" mode.
+
+    Returns:
+    - dict: Record of the document, with its results or an error, or marked unchanged.
+    """
+    from pii_identifier import main
+    from result_cache import hash_file
+
+    start = time.perf_counter()
+    record = {"path": path}
+    try:
+        if hash_content:
+            stat = os.stat(path)
+            record["size"] = stat.st_size
+            record["mtime_ns"] = stat.st_mtime_ns
+            record["content_hash"] = hash_file(path)
+            if record["content_hash"] == known_hash:
+                record["unchanged"] = True
+                record["seconds"] = time.perf_counter() - start
+                return record
+        else:
+            record["size"] = os.path.getsize(path)
+        # Files are the unit of parallelism here, so PDFs are not split across further processes
+        results = main(
+            input_file_path=path, entities_to_extract=entities_to_extract, pdf_workers=0,
+            output_mode=output_mode, detect_condition=detect_condition
+        )
+        if results is None:
+            record["error"] = "Unsupported file format. Please provide a PDF, DOCX, or TXT file."
+        elif "error" in results:
+            record["error"] = results["error"]
+        else:
+            record["results"] = results
+    except Exception as e:
+        record["error"] = str(e)
+
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def iter_scan_records(tasks, entities_to_extract, workers, output_mode="values", hash_content=False, detect_condition="any"):
+    """
+    Analyzes files in a pool of worker processes, yielding each record as soon as it is ready.
+
+    Parameters:
+    - tasks (iterable): (path, known_hash) pairs of the files, as taken by scan_file().
+    - entities_to_extract (list): Entity names to extract.
+    - workers (int): Number of worker processes; 1 analyzes the files in this process.
+    - output_mode (str): Output mode of main().
+    - hash_content (bool): Whether to hash the content of each file, see scan_file().
+    - detect_condition (str): Detect condition of main(), used in "detect" mode.
+
+    Yields:
+    - dict: Record of each document, in completion order.
+    """
+    if workers <= 1:
+        for path, known_hash in tasks:
+            yield scan_file(path, entities_to_extract, output_mode, hash_content, known_hash, detect_condition)
+        return
+
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        while True:
+            while len(pending) < workers * QUEUED_PER_WORKER:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                path, known_hash = task
+                pending.add(pool.submit(
+                    scan_file, path, entities_to_extract, output_mode, hash_content, known_hash, detect_condition
+                ))
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class ProgressReporter:
+    """
+    Writes the number of documents scanned and the throughput to a stream, at most once per interval.
+    """
+
+    def __init__(self, stream=sys.stderr, interval=PROGRESS_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.documents = 0
+        self.errors = 0
+        self.skipped = 0
+        self.bytes = 0
+
+    def update(self, record):
+        self.documents += 1
+        self.errors += "error" in record
+        self.bytes += record.get("size", 0)
+        self.tick()
+
+    def skip(self):
+        self.skipped += 1
+        self.tick()
+
+    def tick(self):
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            # On a terminal each line overwrites the previous one
+            self.report(end="\r" if self.stream.isatty() else "\n")
+
+    def report(self, end="\n"):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        skipped = f", {self.skipped} unchanged" if self.skipped else ""
+        self.stream.write(
+            f"{self.documents} documents ({self.errors} errors{skipped}), {self.bytes / 1e6:.1f} MB in {elapsed:.1f}s: "
+            f"{self.documents / elapsed:.1f} documents/s, {self.bytes / 1e6 / elapsed:.2f} MB/s{end}"
+        )
+        self.stream.flush()
+
+
+def iter_manifest_tasks(files, manifest, recognizer_version, scan_options, progress=None):
+    """
+    Picks the files a manifest scan has to look at, marking each one pending in the manifest.
+
+    Files whose size and modification time match their last successful scan with the
+    same recognizers and options are skipped without being read. Files that changed
+    on disk are passed with their last content hash, so workers can still skip them
+    when only their modification time changed.
+
+    Parameters:
+    - files (iterable): Paths of the files.
+    - manifest (ScanManifest): Manifest of earlier scans.
+    - recognizer_version (str): Current recognizer version.
+    - scan_options (str): Current scan options.
+    - progress (ProgressReporter): Reporter told about skipped files, or None.
+
+    Yields:
+    - tuple: (path, known_hash) of each file to scan.
+    """
+    for path in files:
+        row = manifest.get(path)
+        known_hash = None
+        if manifest.has_current_result(row, recognizer_version, scan_options):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Left to the worker, which records the error
+                stat = None
+            if stat is not None and manifest.is_current(row, stat, recognizer_version, scan_options):
+                if progress is not None:
+                    progress.skip()
+                continue
+            known_hash = row["content_hash"]
+
+        manifest.mark_pending(path)
+        yield path, known_hash
+
+
+def record_in_manifest(manifest, record, recognizer_version, scan_options):
+    status = STATUS_ERROR if "error" in record else STATUS_DONE
+    manifest.record(
+        record["path"], record.get("size"), record.get("mtime_ns"), record.get("content_hash"),
+        recognizer_version, scan_options, status
+    )
+
+
+def scan(paths, entities_to_extract, workers, output, output_mode="values", progress=None, manifest=None, detect_condition="any"):
+    """
+    Scans files and directories and writes one JSON line per document.
+
+    Parameters:
+    - paths (list): Files and directories to scan.
+    - entities_to_extract (list): Entity names to extract.
+    - workers (int): Number of worker processes.
+    - output: Text stream the JSON lines are written to.
+    - output_mode (str): Output mode of main().
+    - progress (ProgressReporter): Reporter updated after every document, or None for no progress.
+    - manifest (ScanManifest): Manifest to resume from and keep up to date, or None to scan every file.
+      Unchanged files are skipped and get no JSON line.
+    - detect_condition (str): Detect condition of main(), used in "detect" mode.
+
+    Returns:
+    - int: Number of documents that could not be analyzed.
+    """
+    from pii_identifier import SUPPORTED_FILE_EXTENSIONS, get_recognizer_version
+
+    errors = 0
+    files = iter_input_files(paths, SUPPORTED_FILE_EXTENSIONS)
+    if manifest is None:
+        tasks = ((path, None) for path in files)
+    else:
+        recognizer_version = get_recognizer_version()
+        options = {"entities": entities_to_extract, "output_mode": output_mode}
+        if output_mode == "detect":
+            options["detect_condition"] = detect_condition
+        scan_options = json.dumps(options)
+        tasks = iter_manifest_tasks(files, manifest, recognizer_version, scan_options, progress)
+
+    for record in iter_scan_records(tasks, entities_to_extract, workers, output_mode, manifest is not None, detect_condition):
+        if manifest is not None and record.pop("unchanged", False):
+            record_in_manifest(manifest, record, recognizer_version, scan_options)
+            if progress is not None:
+                progress.skip()
+            continue
+
+        output.write(json.dumps(record) + "\n")
+        if manifest is not None:
+            # The line is written out before the manifest marks the document done, and the
+            # mark is committed right away, so a resumed scan does not write the line again
+            output.flush()
+            record_in_manifest(manifest, record, recognizer_version, scan_options)
+            manifest.commit()
+        errors += "error" in record
+        if progress is not None:
+            progress.update(record)
+
+    if progress is not None:
+        progress.report()
+    return errors
+
+
+def parse_args(argv=None):
+    from pii_identifier import DETECT_CONDITIONS, ENTITY_TYPES, OUTPUT_MODES
+
+    parser = argparse.ArgumentParser(prog="python -m pii_identifier", description="Find PII in documents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = commands.add_parser("scan", help="Scan PDF, DOCX and TXT files and directories, writing JSON lines.")
+    scan_parser.add_argument("paths", nargs="+", help="Files and directories to scan; directories are walked recursively.")
+    scan_parser.add_argument("--entities", default=",".join(ENTITY_TYPES),
+                             help="Comma-separated entity names to extract (default: all).")
+    scan_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                             help="Number of worker processes (default: the number of CPUs).")
+    scan_parser.add_argument("--output", help="Write the JSON lines to this file instead of stdout.")
+    scan_parser.add_argument("--output-mode", choices=OUTPUT_MODES, default="values", help="Output mode of each result.")
+    scan_parser.add_argument("--detect-condition", choices=DETECT_CONDITIONS, default="any",
+                             help="With --output-mode detect, whether any or all of the entities must occur.")
+    scan_parser.add_argument("--manifest",
+                             help="SQLite file recording the scanned documents; resumes and skips unchanged documents. "
+                                  "The output file is appended to.")
+    scan_parser.add_argument("--quiet", action="store_true", help="Do not report progress on stderr.")
+    return parser.parse_args(argv)
+
+
+def run_cli(argv=None):
+    """
+    Runs the command line.
+
+    Parameters:
+    - argv (list): Arguments, defaulting to sys.argv.
+
+    Returns:
+    - int: Exit status: 0, or 1 when some documents could not be analyzed.
+    """
+    from pii_identifier import ENTITY_TYPES
+
+    args = parse_args(argv)
+
+    entities = [entity.strip() for entity in args.entities.split(",") if entity.strip()]
+    unknown = [entity for entity in entities if entity not in ENTITY_TYPES]
+    if unknown:
+        sys.exit(f"Unknown entities: {', '.join(unknown)}")
+
+    progress = None if args.quiet else ProgressReporter()
+    manifest = ScanManifest(args.manifest) if args.manifest else None
+    # A manifest scan only writes the documents it analyzed, so earlier lines are kept
+    output_file_mode = "a" if manifest is not None else "w"
+    try:
+        if args.output:
+            with open(args.output, output_file_mode, encoding="utf-8") as output:
+                errors = scan(args.paths, entities, args.workers, output, args.output_mode, progress, manifest, args.detect_condition)
+        else:
+            errors = scan(args.paths, entities, args.workers, sys.stdout, args.output_mode, progress, manifest, args.detect_condition)
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    return 1 if errors else 0
@@ -0,0 +1,36 @@
+import functools
+
+import pii_identifier
+
+# Entities found by patterns, deny-lists and the date engine, whose hits do not depend on the words around them
+CHUNKED_ENTITIES = ["EMAIL", "PHONE_NUMBER", "TAX_ID", "DRIVER_LICENSE", "AAA_NUMBERS", "PATIENT_ID", "CITIZENSHIP", "DATES"]
+
+
+def build_long_text():
+    # Entities land at every offset around the window seams as the filler grows
+    sentences = []
+    for index in range(150):
+        filler = "words " * (index % 9)
+        sentences.append(
+            f"{filler}Write to jane{index}@mail.org or call (555) 123-{index:04d} about the Immigrant visa of "
+            f"member 12-34-{index:04d}-9012, tax ID 123-45-{index:04d}, patient ABC-{index:05d}-X9, on March {index % 28 + 1}, 2020."
+        )
+    return " ".join(sentences)
+
+
+def hit_keys(hits):
+    return sorted((hit["entity_type"], hit["start"], hit["end"], hit["value"]) for hit in hits)
+
+
+def test_chunked_analysis_matches_whole_text(monkeypatch):
+    text = build_long_text()
+    plan = pii_identifier.build_analysis_plan(CHUNKED_ENTITIES)
+
+    whole = pii_identifier.analyze_window(plan, text)
+    monkeypatch.setattr(pii_identifier, "CHUNK_SIZE", 2000)
+    monkeypatch.setattr(pii_identifier, "iter_text_windows", functools.partial(pii_identifier.iter_text_windows, size=2000, overlap=500))
+    chunked = pii_identifier.analyze_text(plan, text)
+
+    assert len(list(pii_identifier.iter_text_windows(text))) > 10
+    assert hit_keys(chunked) == hit_keys(whole)
+    assert {hit["entity_type"] for hit in whole} >= {"EMAIL", "PHONE_NUMBER", "TAX_ID", "AAA Number", "CITIZENSHIP"}
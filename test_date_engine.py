@@ -0,0 +1,13 @@
+import pytest
+
+import date_engine
+
+
+def test_format_without_a_day_is_rejected():
+    with pytest.raises(ValueError, match="'%B %Y' has no day field"):
+        date_engine.compile_date_pattern(("%Y-%m-%d", "%B %Y"))
+
+
+def test_format_without_a_year_is_rejected():
+    with pytest.raises(ValueError, match="'%d/%m' has no year or short_year field"):
+        date_engine.find_dates("on 03/04", ["%d/%m"])
@@ -0,0 +1,28 @@
+from presidio_analyzer import PatternRecognizer
+
+import deny_list_matcher
+
+
+def build_deny_list_corpus(deny_lists):
+    # Terms of every list in upper, title and lower case, glued to words and punctuation
+    sentences = []
+    for terms in deny_lists.values():
+        for index, term in enumerate(terms[::max(len(terms) // 40, 1)]):
+            variant = [term.upper(), term.title(), term.lower()][index % 3]
+            sentences.append(f"Noted {variant}, then ({term}) and x{term} or {term}s; {term}-{term}.")
+    return "\n".join(sentences)
+
+
+def test_automaton_matches_presidio_deny_lists():
+    deny_lists = deny_list_matcher.load_deny_lists()
+    automaton = deny_list_matcher.build_automaton(deny_lists)
+    text = build_deny_list_corpus(deny_lists)
+
+    matches = deny_list_matcher.find_deny_list_matches(automaton, text)
+
+    for entity_type, terms in deny_lists.items():
+        recognizer = PatternRecognizer(supported_entity=entity_type, deny_list=terms)
+        expected = sorted((result.start, result.end) for result in recognizer.analyze(text, [entity_type]))
+        found = [(start, end) for start, end, found_type in matches if found_type == entity_type]
+        assert expected
+        assert found == expected, entity_type
@@ -0,0 +1,50 @@
+from presidio_analyzer import Pattern, PatternRecognizer
+
+import pattern_scanner
+
+# One value of every pattern entity that does not overlap a match of another pattern.
+# An AAA number always holds a date of birth, so it is only checked for overlaps.
+SEPARATE_VALUES = [
+    "jane.doe@mail.org", "1234 5678 9012 3456", "ABC-12345-X9", "AB1-123456-XY3",
+    "123-45-6789", "1990-01-02", "(555) 123-4567", "12 Elm Road", "AB12CD34EF"
+]
+
+OVERLAPPING_TEXT = "Member 12-34-5678-9012 and 5551234567."
+
+
+def build_pattern_corpus():
+    sentences = []
+    for index in range(60):
+        values = SEPARATE_VALUES[index % len(SEPARATE_VALUES):] + SEPARATE_VALUES[:index % len(SEPARATE_VALUES)]
+        sentences.append("Record " + ", then ".join(values) + ".")
+    return "\n".join(sentences)
+
+
+def scan_with_presidio(text):
+    results = []
+    for entity_type, regex, score in pattern_scanner.PATTERN_DEFINITIONS:
+        recognizer = PatternRecognizer(supported_entity=entity_type, patterns=[Pattern(name=entity_type, regex=regex, score=score)])
+        results.extend((result.start, result.end, entity_type, result.score) for result in recognizer.analyze(text, [entity_type]))
+    return sorted(results)
+
+
+def test_independent_scan_matches_presidio_recognizers():
+    text = build_pattern_corpus() + "\n" + OVERLAPPING_TEXT
+
+    assert pattern_scanner.scan_patterns(text, overlap_policy="independent") == scan_with_presidio(text)
+
+
+def test_fused_scan_matches_independent_scan_without_overlaps():
+    text = build_pattern_corpus()
+    independent = pattern_scanner.scan_patterns(text, overlap_policy="independent")
+    assert all(previous[1] <= current[0] for previous, current in zip(independent, independent[1:]))
+
+    assert pattern_scanner.scan_patterns(text, overlap_policy="priority") == independent
+    assert {entity_type for _, _, entity_type, _ in independent} == set(pattern_scanner.PATTERN_ENTITY_TYPES) - {"AAA Number"}
+
+
+def test_fused_scan_reports_overlaps_as_the_earliest_pattern():
+    assert pattern_scanner.scan_patterns(OVERLAPPING_TEXT, overlap_policy="priority") == [
+        (7, 22, "AAA Number", 0.9),
+        (27, 37, "PHONE_NUMBER", 0.8)
+    ]
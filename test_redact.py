@@ -0,0 +1,65 @@
+import functools
+
+import pytest
+
+import pii_identifier
+
+REDACTED_ENTITIES = ["EMAIL", "PHONE_NUMBER", "TAX_ID", "DRIVER_LICENSE", "AAA_NUMBERS", "LOCATION", "PATIENT_ID", "DATES", "CITIZENSHIP"]
+
+
+def build_seam_corpus():
+    # Entities land at every offset around the window seams as the filler grows
+    sentences = []
+    for index in range(120):
+        filler = "notes " * (index % 7)
+        sentences.append(
+            f"{filler}Call (555) 123-{index:04d} or jane{index}@mail.org about the Immigrant visa, "
+            f"member 12-34-{index:04d}-9012, plate ABC-12{index:03d}-X9 at {index} Elm Road City on March {index % 28 + 1}, 2020."
+        )
+    return " ".join(sentences)
+
+
+def test_windowed_redaction_matches_whole_text(monkeypatch):
+    text = build_seam_corpus()
+
+    whole = pii_identifier.redact(input_text=text, entities_to_extract=REDACTED_ENTITIES)
+    monkeypatch.setattr(pii_identifier, "iter_text_windows", functools.partial(pii_identifier.iter_text_windows, size=1500, overlap=500))
+    windowed = pii_identifier.redact(input_text=text, entities_to_extract=REDACTED_ENTITIES)
+
+    assert "error" not in whole
+    assert windowed == whole
+
+
+
+def test_redact_dates_keeps_surrounding_words():
+    text = "Born on March 3, 2020 and 2021-01-05"
+
+    result = pii_identifier.redact(input_text=text, entities_to_extract=["DATES"])
+
+    assert result == {"redacted_text": "Born on <DATES> and <DATES>"}
+
+
+def test_date_spans_cover_only_the_date():
+    text = "Born on March 3, 2020 and 2021-01-05"
+
+    spans = [text[hit["start"]:hit["end"]] for hit in pii_identifier.find_date_spans(text)]
+
+    assert spans == ["March 3, 2020", "2021-01-05"]
+
+
+def test_hits_starting_inside_earlier_ones_are_dropped():
+    hits = [
+        pii_identifier.build_hit("PHONE_NUMBER", 0, 14, 0.8, "FusedPatternRecognizer", "(555) 123-4567"),
+        pii_identifier.build_hit("LOCATION", 10, 25, 0.85, "FusedPatternRecognizer", "4567 Elm Road"),
+        pii_identifier.build_hit("EMAIL", 30, 40, 1.0, "FusedPatternRecognizer", "a@mail.org"),
+    ]
+
+    assert pii_identifier.remove_overlapping_hits(hits) == [("PHONE_NUMBER", 0, 14, 0.8), ("EMAIL", 30, 40, 1.0)]
+    assert pii_identifier.remove_overlapping_hits(hits, start=12) == [("EMAIL", 30, 40, 1.0)]
+
+
+def test_operator_that_is_not_an_object_is_rejected():
+    plan = pii_identifier.build_analysis_plan(["EMAIL"])
+
+    with pytest.raises(ValueError, match="operator for EMAIL must be an object with a 'type' key"):
+        pii_identifier.build_operator_configs(plan, {"EMAIL": "mask"})